@@ -0,0 +1,270 @@
+"""
+Benchmarks for the search, storage and page-build hot paths.
+
+Runs headless on synthetic catalogs (no browser, no network) and writes
+a JSON report that can be compared against an earlier run:
+
+    python benchmarks/bench.py --sizes 1000 10000 --output before.json
+    python benchmarks/bench.py --sizes 1000 10000 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edutube.backup import export_backup, verify_backup  # noqa: E402
+from edutube.catalog import catalog_stats, index_catalog, new_key, sample_videos  # noqa: E402
+from edutube.search import FIELD_WEIGHTS, SCORE_THRESHOLD, SearchIndex, calculate_search_score  # noqa: E402
+from edutube.semantic import available as semantic_available  # noqa: E402
+from edutube.storage import JsonStorage, file_cache  # noqa: E402
+
+WORDS = (
+    "python calculus derivatives integration algebra physics chemistry biology "
+    "history lecture intro basics advanced tutorial part data structures algorithms "
+    "machine learning linear regression quantum mechanics thermodynamics geometry "
+    "statistics probability economics programming networks databases compilers"
+).split()
+
+QUERIES = ["python", "calc", "machine learning", "pyhton", "intro to algebra", "quantum", "zzz"]
+
+
+def make_catalog(n_videos, n_categories, description_words, seed=0):
+    """Synthetic catalog in the storage shape: {"categories": {category: {key: video}}}."""
+    rng = random.Random(seed)
+    categories = [f"{rng.choice(WORDS).title()} {i}" for i in range(n_categories)]
+    data = {"categories": {category: {} for category in categories}}
+    for i in range(n_videos):
+        key = new_key()
+        video_id = "".join(rng.choices(string.ascii_letters + string.digits + "-_", k=11))
+        data["categories"][rng.choice(categories)][key] = {
+            "key": key,
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(3, 8))).title(),
+            "url": f"https://youtu.be/{video_id}",
+            "video_id": video_id,
+            "description": " ".join(rng.choices(WORDS, k=description_words)),
+            "tags": rng.sample(WORDS, 3),
+            "added_date": f"2024-01-01 00:00:{i % 60:02d}",
+        }
+    data["categories"] = {c: v for c, v in data["categories"].items() if v}
+    return data
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def peak_memory(fn):
+    """Peak Python heap allocated while running fn, in MB."""
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def full_scan(index, query):
+    """Fuzzy-score every video, as search did before the index existed."""
+    results = []
+    for category, video in index.docs.values():
+        score = (
+            calculate_search_score(query, video["title"])
+            + calculate_search_score(query, video.get("description", "")) * FIELD_WEIGHTS["description"]
+            + calculate_search_score(query, category) * FIELD_WEIGHTS["category"]
+        )
+        if score > SCORE_THRESHOLD:
+            results.append(score)
+    return sorted(results, reverse=True)[:20]
+
+
+def bench_search(data, repeat, scan):
+    result = {}
+    build = timed(lambda: SearchIndex.from_catalog(data), 1)
+    result["index_build_s"] = round(build[0], 3)
+    result["index_build_peak_mb"] = peak_memory(lambda: SearchIndex.from_catalog(data))
+
+    index = SearchIndex.from_catalog(data)
+    # Clear the result cache before each cold timing so it does not hide the work
+    cold = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            index._results.clear()
+            cold.extend(timed(lambda: index.search(query), 1))
+    result["query_cold"] = percentiles(cold)
+    for query in QUERIES:
+        index.search(query)
+    result["query_cached"] = percentiles([t for query in QUERIES for t in timed(lambda: index.search(query), repeat)])
+
+    if semantic_available():
+        result["semantic_build_s"] = round(timed(index.enable_semantic, 1)[0], 3)
+        result["query_semantic"] = percentiles(
+            [t for query in QUERIES for t in timed(lambda: index.vectors.search(query), repeat)]
+        )
+
+    if scan:
+        result["query_full_scan"] = percentiles([t for query in QUERIES for t in timed(lambda: full_scan(index, query), 1)])
+    return result
+
+
+def bench_storage(data, repeat):
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "videos_data.json")
+        storage = JsonStorage(path, os.path.join(tmp, "video_notes.json"), auto_compact=False)
+        storage.videos.replace({"categories": data["categories"]})
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        def cold_load():
+            file_cache.invalidate(path)
+            return storage.load_videos()
+
+        load = timed(cold_load, repeat)
+        result["file_mb"] = round(size_mb, 2)
+        result["load"] = percentiles(load)
+        result["load_mb_per_s"] = round(size_mb / statistics.median(load), 1)
+        result["load_peak_mb"] = peak_memory(cold_load)
+
+        category = next(iter(data["categories"]))
+        video = dict(next(iter(data["categories"][category].values())))
+        append = []
+        compact = []
+        for _ in range(repeat):
+            video["key"] = new_key()
+            append.extend(timed(lambda: storage.add_video(category, video), 1))
+            # Folding the journal rewrites the whole snapshot
+            compact.extend(timed(storage.videos.compact, 1))
+        result["journal_add"] = percentiles(append)
+        result["compact"] = percentiles(compact)
+        result["compact_mb_per_s"] = round(size_mb / statistics.median(compact), 1)
+        storage.load_videos()
+        result["cached_load"] = percentiles(timed(storage.load_videos, repeat))
+
+        backup = os.path.join(tmp, "backup.jsonl.gz")
+        result["backup_export"] = percentiles(timed(lambda: export_backup(backup, storage), repeat))
+        result["backup_mb"] = round(os.path.getsize(backup) / 1024 / 1024, 2)
+        result["backup_verify"] = percentiles(timed(lambda: verify_backup(backup), repeat))
+        result["backup_verify_peak_mb"] = peak_memory(lambda: verify_backup(backup))
+    return result
+
+
+def bench_pages(data, repeat):
+    """The data work behind each page render, without Streamlit widgets."""
+    indexed = index_catalog(dict(data))
+    page_size = 18
+    return {
+        "home_sample_12": percentiles(timed(lambda: sample_videos(indexed, 12, seed=1), repeat)),
+        "all_videos_page": percentiles(timed(
+            lambda: [list(islice(videos.values(), 0, page_size)) for videos in indexed["categories"].values()],
+            repeat,
+        )),
+        "sidebar_stats": percentiles(timed(lambda: catalog_stats(indexed), repeat)),
+    }
+
+
+def run(sizes, repeat, scan_limit):
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {},
+    }
+    for n_videos in sizes:
+        for n_categories, description_words in ((max(1, n_videos // 50), 20), (10, 200)):
+            name = f"{n_videos}v_{n_categories}c_{description_words}w"
+            print(f"== {name}", file=sys.stderr)
+            data = make_catalog(n_videos, n_categories, description_words)
+            report["results"][name] = {
+                "search": bench_search(data, repeat, scan=n_videos <= scan_limit),
+                "storage": bench_storage(data, repeat),
+                "pages": bench_pages(data, repeat),
+            }
+    return report
+
+
+def flatten(tree, prefix=""):
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            yield from flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def compare(report, baseline, tolerance, floor_ms=0.1):
+    """
+    Print timings that got slower, and throughputs (*_per_s) that dropped,
+    by more than tolerance (e.g. 0.2 = 20%) vs baseline.
+    Timings under floor_ms in the baseline are too noisy to compare.
+    """
+    old = dict(flatten(baseline["results"]))
+    regressions = 0
+    for name, value in flatten(report["results"]):
+        if name not in old or not old[name]:
+            continue
+        if name.endswith("_per_s"):
+            change = (old[name] - value) / old[name]
+            if change > tolerance:
+                regressions += 1
+                print(f"SLOWER  {name}: {old[name]} -> {value} (-{change:.0%})")
+            continue
+        if not name.endswith(("_ms", "_s")):
+            continue
+        if old[name] * (1 if name.endswith("_ms") else 1000) < floor_ms:
+            continue
+        change = (value - old[name]) / old[name]
+        if change > tolerance:
+            regressions += 1
+            print(f"SLOWER  {name}: {old[name]} -> {value} (+{change:.0%})")
+    print(f"{regressions} regression(s) over {tolerance:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scan-limit", type=int, default=10000,
+                        help="largest catalog to also time the unindexed full scan on")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat, args.scan_limit)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            sys.exit(1 if compare(report, json.load(f), args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""
+Core library behind the Education Tube app: catalog model, storage,
+search and notes. Nothing here imports Streamlit, so it can be used from
+scripts, benchmarks and batch jobs.
+"""
+from .catalog import find_video, find_video_by_id, index_catalog, make_video, sample_videos
+from .notes import make_note
+from .search import NoteIndex, SearchIndex, calculate_search_score
+from .storage import JsonStorage, SqliteStorage, get_storage
+from .urls import extract_video_id
@@ -0,0 +1,149 @@
+"""
+Access-code check used by the login page.
+
+The code is stored as a salted PBKDF2 hash, read from EDUTUBE_PASSWORD_HASH
+(default: the original access code). To set a new one:
+
+    python -m edutube.auth        # prompts for the code, prints the hash
+    export EDUTUBE_PASSWORD_HASH='pbkdf2_sha256$200000$<salt>$<hash>'
+
+Every attempt costs one hash of a length-capped input, and LoginThrottle
+makes repeated failures from one client wait exponentially longer. Behind a
+reverse proxy, set EDUTUBE_CLIENT_IP_HEADER (e.g. X-Forwarded-For) to the
+header the proxy puts the client address in; otherwise every user shares
+the proxy's address, and so its lockout.
+"""
+import getpass
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+ALGORITHM = "pbkdf2_sha256"
+ITERATIONS = 200_000
+# Longer inputs are rejected before hashing
+MAX_INPUT_LENGTH = 128
+# Hash of the original access code
+DEFAULT_PASSWORD_HASH = (
+    "pbkdf2_sha256$200000$bdb99661049b0c4180c449e467c9d454$"
+    "7d21c1073892862785e06568fe3fa0cb3876a0bab9817ba29dcb4e4492195d54"
+)
+
+# Failures allowed before backoff starts, then 1s, 2s, 4s ... up to 15 minutes
+FREE_ATTEMPTS = 3
+BASE_DELAY = 1.0
+MAX_DELAY = 15 * 60.0
+# Clients tracked at once; the least recently seen are forgotten first
+MAX_CLIENTS = 10_000
+
+
+def hash_password(password, salt=None, iterations=ITERATIONS):
+    """'pbkdf2_sha256$iterations$salt$hash' for password, with a random salt by default."""
+    salt = salt or os.urandom(16).hex()
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations)
+    return f"{ALGORITHM}${iterations}${salt}${digest.hex()}"
+
+
+def verify_password(password, encoded):
+    """Constant-time check of password against a hash_password() string."""
+    try:
+        algorithm, iterations, salt, expected = encoded.split("$")
+        if algorithm != ALGORITHM:
+            return False
+        actual = hash_password(password, salt, int(iterations)).rsplit("$", 1)[1]
+    except (ValueError, OverflowError):  # malformed hash, e.g. a salt that isn't hex
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def validate_access_credentials(user_input):
+    if not isinstance(user_input, str) or not user_input or len(user_input) > MAX_INPUT_LENGTH:
+        return False
+    return verify_password(user_input, os.environ.get("EDUTUBE_PASSWORD_HASH", DEFAULT_PASSWORD_HASH))
+
+
+def client_key(ip_address, headers):
+    """
+    Address to throttle a client by: the one its connection comes from, or
+    with EDUTUBE_CLIENT_IP_HEADER set, the last one the proxy put in that header.
+    """
+    header = os.environ.get("EDUTUBE_CLIENT_IP_HEADER")
+    if header and headers and headers.get(header):
+        return headers.get(header).split(",")[-1].strip()
+    return ip_address or "local"
+
+
+class LoginThrottle:
+    """
+    Per-client failure counts with exponential backoff.
+    One instance is shared by all sessions, so reruns and new sessions
+    from the same client see the same lockout.
+    """
+
+    def __init__(self, free_attempts=FREE_ATTEMPTS, base_delay=BASE_DELAY,
+                 max_delay=MAX_DELAY, max_clients=MAX_CLIENTS, clock=time.monotonic):
+        self.free_attempts = free_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_clients = max_clients
+        self.clock = clock
+        # client -> (failures, locked until)
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def retry_after(self, client):
+        """Seconds client must wait before its next attempt (0 if it may try now)."""
+        with self._lock:
+            _, locked_until = self._clients.get(client, (0, 0.0))
+        return max(0.0, locked_until - self.clock())
+
+    def failures(self, client):
+        with self._lock:
+            return self._clients.get(client, (0, 0.0))[0]
+
+    def record_failure(self, client):
+        """Count a failed attempt; returns the new wait in seconds."""
+        with self._lock:
+            return self._record_failure(client)
+
+    def _record_failure(self, client):
+        failures = self._clients.pop(client, (0, 0.0))[0] + 1
+        delay = 0.0
+        if failures > self.free_attempts:
+            delay = min(self.max_delay, self.base_delay * 2 ** (failures - self.free_attempts - 1))
+        self._clients[client] = (failures, self.clock() + delay)
+        if len(self._clients) > self.max_clients:
+            self._clients.popitem(last=False)
+        return delay
+
+    def record_success(self, client):
+        with self._lock:
+            self._clients.pop(client, None)
+
+    def attempt(self, client, user_input):
+        """
+        Check user_input for client, recording the outcome.
+        A locked out client is refused without hashing anything. The attempt
+        is counted as a failure before hashing (and cleared on success), so
+        parallel attempts from one client can't all get past the lockout.
+        """
+        with self._lock:
+            _, locked_until = self._clients.get(client, (0, 0.0))
+            if locked_until > self.clock():
+                return False
+            self._record_failure(client)
+        if validate_access_credentials(user_input):
+            self.record_success(client)
+            return True
+        return False
+
+
+if __name__ == "__main__":
+    # python -m edutube.auth  ->  hash for EDUTUBE_PASSWORD_HASH
+    password = getpass.getpass("New access code: ")
+    if not password or len(password) > MAX_INPUT_LENGTH:
+        sys.exit(f"The access code must be 1 to {MAX_INPUT_LENGTH} characters")
+    print(hash_password(password))
@@ -0,0 +1,176 @@
+"""
+Streaming backup and restore of the whole library (videos and notes).
+
+    python -m edutube.backup export backup.jsonl.gz
+    python -m edutube.backup verify backup.jsonl.gz
+    python -m edutube.backup restore backup.jsonl.gz --replace
+
+A backup is JSON Lines, one compact record per line: a header, every
+video, every note, then a trailer with the record counts and the SHA-256
+of all lines before it. Files ending in .gz are gzip compressed (the
+compact snapshot format); restore detects compression from the file
+itself. Records are written and read one at a time, so neither side
+holds the file in memory, and a restore verifies the whole file before
+it changes anything.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import zlib
+from datetime import datetime
+from itertools import groupby
+
+from .storage import get_storage
+
+FORMAT = "edutube-backup"
+VERSION = 1
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _open(path, mode):
+    if "w" in mode:
+        compressed = path.endswith(".gz")
+    else:
+        with open(path, "rb") as f:
+            compressed = f.read(2) == GZIP_MAGIC
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    return open(path, mode, encoding="utf-8")
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def export_backup(path, storage=None):
+    """Stream every video and note to path; returns (videos, notes)."""
+    storage = storage or get_storage()
+    checksum = hashlib.sha256()
+    counts = {"video": 0, "note": 0}
+
+    def records():
+        yield {"type": "header", "format": FORMAT, "version": VERSION,
+               "created": datetime.now().isoformat(timespec="seconds")}
+        for category, video in storage.iter_videos():
+            counts["video"] += 1
+            yield {"type": "video", "category": category, "video": video}
+        for video_id, video_title, note in storage.iter_notes():
+            counts["note"] += 1
+            yield {"type": "note", "video_id": video_id, "video_title": video_title, "note": note}
+
+    with _open(path, "w") as f:
+        for record in records():
+            line = _line(record)
+            checksum.update(line.encode("utf-8"))
+            f.write(line)
+        f.write(_line({"type": "end", "videos": counts["video"], "notes": counts["note"],
+                       "sha256": checksum.hexdigest()}))
+    return counts["video"], counts["note"]
+
+
+def read_records(path):
+    """
+    Yield the header, video and note records of a backup one at a time.
+    Raises ValueError once the file turns out truncated, corrupt or
+    inconsistent with its trailer.
+    """
+    try:
+        yield from _read_records(path)
+    except EOFError:
+        raise ValueError("backup is truncated (compressed stream ends early)") from None
+    except (zlib.error, gzip.BadGzipFile) as e:
+        raise ValueError(f"backup is corrupt: {e}") from None
+
+
+def _read_records(path):
+    checksum = hashlib.sha256()
+    counts = {"video": 0, "note": 0}
+    with _open(path, "r") as f:
+        for line_num, line in enumerate(f, 1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {line_num}: invalid JSON: {e.msg}") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"line {line_num}: not a JSON object, the backup is corrupt")
+            kind = record.get("type")
+
+            if line_num == 1:
+                if kind != "header" or record.get("format") != FORMAT:
+                    raise ValueError(f"{path} is not an {FORMAT} file")
+                if record.get("version") != VERSION:
+                    raise ValueError(f"unsupported backup version {record.get('version')}")
+            elif kind == "end":
+                if record.get("sha256") != checksum.hexdigest():
+                    raise ValueError("checksum mismatch, the backup is corrupt")
+                if (record.get("videos"), record.get("notes")) != (counts["video"], counts["note"]):
+                    raise ValueError("record counts do not match the trailer")
+                return
+            elif kind in counts:
+                counts[kind] += 1
+            else:
+                raise ValueError(f"line {line_num}: unknown record type {kind!r}")
+
+            checksum.update(line.encode("utf-8"))
+            yield record
+    raise ValueError("backup is truncated (no trailer)")
+
+
+def verify_backup(path):
+    """(videos, notes) in a backup, after checking it end to end."""
+    counts = {"header": 0, "video": 0, "note": 0}
+    for record in read_records(path):
+        counts[record["type"]] += 1
+    return counts["video"], counts["note"]
+
+
+def restore_backup(path, storage=None, replace=False):
+    """
+    Load a backup into storage in batched writes; returns (videos, notes).
+    With replace, the current library is cleared first; otherwise records
+    are upserted by key. The file is verified before anything is written.
+    """
+    storage = storage or get_storage()
+    verify_backup(path)
+    if replace:
+        storage.clear()
+
+    counts = {"video": 0, "note": 0}
+    for kind, records in groupby(read_records(path), key=lambda record: record["type"]):
+        if kind == "video":
+            counts[kind] += storage.add_videos((r["category"], r["video"]) for r in records)
+        elif kind == "note":
+            counts[kind] += storage.add_notes((r["video_id"], r["video_title"], r["note"]) for r in records)
+    return counts["video"], counts["note"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=["export", "verify", "restore"])
+    parser.add_argument("path", help="backup file (.jsonl, or .jsonl.gz to compress)")
+    parser.add_argument("--replace", action="store_true",
+                        help="restore: clear the library first instead of merging into it")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "export":
+            videos, notes = export_backup(args.path)
+            print(f"Exported {videos} videos and {notes} notes to {args.path}")
+        elif args.command == "verify":
+            videos, notes = verify_backup(args.path)
+            print(f"OK: {videos} videos and {notes} notes")
+        else:
+            videos, notes = restore_backup(args.path, replace=args.replace)
+            print(f"Restored {videos} videos and {notes} notes")
+    except (OSError, ValueError) as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Catalog model.
+
+A catalog is {"categories": {category: {key: video}}}; after index_catalog
+it also carries "index" (key -> category), "keys" (flat list of keys) and
+"by_video_id" (YouTube video_id -> (category, key) of its first copy).
+"""
+import hashlib
+import random
+import uuid
+from datetime import datetime
+
+
+def now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def new_key():
+    """Stable unique key for a new video or note."""
+    return uuid.uuid4().hex[:16]
+
+
+def legacy_key(*parts):
+    """Deterministic key for records saved before keys existed."""
+    return hashlib.sha1("\x1f".join(map(str, parts)).encode()).hexdigest()[:16]
+
+
+def parse_tags(tags):
+    """
+    Tags as a list: stripped, lowercased, without blanks or repeats.
+    Accepts a list or a comma separated string ("Python, basics").
+    """
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    parsed = []
+    for tag in tags:
+        tag = tag.strip().lower()
+        if tag and tag not in parsed:
+            parsed.append(tag)
+    return parsed
+
+
+def normalize_catalog(data):
+    """
+    Catalog shape: {"categories": {category: {key: video}}}.
+    Older files keep each category as a list and tags as a comma
+    separated string; convert those in place.
+    """
+    categories = data.setdefault("categories", {})
+    for category, videos in categories.items():
+        if isinstance(videos, list):
+            keyed = {}
+            for position, video in enumerate(videos):
+                video.setdefault("key", legacy_key(category, position, video["video_id"]))
+                keyed[video["key"]] = video
+            categories[category] = keyed
+        for video in categories[category].values():
+            if not isinstance(video.get("tags"), list):
+                video["tags"] = parse_tags(video.get("tags") or "")
+    return data
+
+
+def index_catalog(data):
+    """
+    Add the key -> category index used for O(1) lookups by key,
+    a flat list of keys for O(1) random access, and the
+    video_id -> (category, key) index used to spot duplicates.
+    """
+    data["index"] = {}
+    data["by_video_id"] = {}
+    for category, videos in data["categories"].items():
+        for key, video in videos.items():
+            data["index"][key] = category
+            data["by_video_id"].setdefault(video["video_id"], (category, key))
+    data["keys"] = list(data["index"])
+    return data
+
+
+def find_duplicate(data, video_id):
+    """(category, key) of the video already holding video_id, or None."""
+    return data["by_video_id"].get(video_id)
+
+
+def find_video(data, key):
+    """(category, video) for a key, or (None, None) if it is gone."""
+    category = data["index"].get(key)
+    if category is None:
+        return None, None
+    return category, data["categories"][category][key]
+
+
+def find_video_by_id(data, video_id):
+    """(category, video) holding a YouTube video_id, or (None, None)."""
+    found = find_duplicate(data, video_id)
+    if found is None:
+        return None, None
+    return find_video(data, found[1])
+
+
+def catalog_stats(videos_data):
+    return {
+        "total_videos": sum(len(videos) for videos in videos_data["categories"].values()),
+        "total_categories": len(videos_data["categories"]),
+    }
+
+
+def sample_videos(data, k, seed=None):
+    """
+    k random (category, video) pairs in O(k), without copying the catalog.
+    The same seed gives the same picks while the catalog is unchanged.
+    """
+    keys = data["keys"]
+    picks = random.Random(seed).sample(range(len(keys)), min(k, len(keys)))
+    return [find_video(data, keys[pick]) for pick in picks]
+
+
+def make_video(title, url, video_id, description="", tags=""):
+    return {
+        "key": new_key(),
+        "title": title,
+        "url": url,
+        "video_id": video_id,
+        "description": description,
+        "tags": parse_tags(tags),
+        "added_date": now(),
+    }
+
+
+def apply_video_op(data, op):
+    categories = data["categories"]
+    if op["op"] == "add":
+        if not isinstance(op["video"].get("tags"), list):
+            op["video"]["tags"] = parse_tags(op["video"].get("tags") or "")
+        categories.setdefault(op["category"], {})[op["video"]["key"]] = op["video"]
+    elif op["op"] == "delete":
+        videos = categories.get(op["category"], {})
+        videos.pop(op["key"], None)
+        if not videos:
+            categories.pop(op["category"], None)
@@ -0,0 +1,80 @@
+"""
+Offline pass that collapses videos added more than once.
+
+    python -m edutube.dedupe --dry-run
+    python -m edutube.dedupe
+
+For every YouTube video_id with several copies, the earliest copy is kept
+and the others are deleted. Tags from all copies are merged into it, and
+its empty description or title are filled from the copies. Notes are
+stored per video_id, so the surviving copy already shows all of them.
+"""
+import argparse
+import sys
+
+from .catalog import parse_tags
+from .storage import get_storage
+
+
+def find_duplicates(data):
+    """{video_id: [(category, video), ...]} for video_ids with several copies, oldest first."""
+    copies = {}
+    for category, videos in data["categories"].items():
+        for video in videos.values():
+            copies.setdefault(video["video_id"], []).append((category, video))
+    return {
+        video_id: sorted(group, key=lambda item: item[1].get("added_date", ""))
+        for video_id, group in copies.items()
+        if len(group) > 1
+    }
+
+
+def merge_tags(*tag_lists):
+    """Union of tag lists, keeping first-seen order."""
+    return parse_tags([tag for tags in tag_lists for tag in parse_tags(tags)])
+
+
+def merge_videos(keep, others):
+    merged = dict(keep)
+    merged["tags"] = merge_tags(keep.get("tags", []), *(video.get("tags", []) for video in others))
+    for field in ("description", "title"):
+        if not merged.get(field):
+            merged[field] = next((video[field] for video in others if video.get(field)), "")
+    return merged
+
+
+def dedupe(storage, dry_run=False):
+    """Collapse duplicates in one batched write; returns (groups, copies removed)."""
+    duplicates = find_duplicates(storage.load_videos())
+    updates = []
+    deletions = []
+    for group in duplicates.values():
+        (category, keep), others = group[0], group[1:]
+        merged = merge_videos(keep, [video for _, video in others])
+        if merged != keep:
+            updates.append((category, merged))
+        deletions.extend((other_category, video["key"]) for other_category, video in others)
+
+    if not dry_run:
+        if updates:
+            storage.add_videos(updates)
+        if deletions:
+            storage.delete_videos(deletions)
+    return len(duplicates), len(deletions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    args = parser.parse_args(argv)
+
+    groups, removed = dedupe(get_storage(), dry_run=args.dry_run)
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {removed} duplicate copies of {groups} videos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
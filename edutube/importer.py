@@ -0,0 +1,183 @@
+"""
+Headless bulk import of videos from CSV or JSONL.
+
+    python -m edutube.importer lectures.csv
+    python -m edutube.importer lectures.jsonl --category "Calculus I" --rejects rejects.jsonl
+
+Each row needs title and url, plus category unless --category is given;
+description, tags and added_date are optional. Rows are streamed, so
+memory stays bounded by the set of known video IDs rather than the file
+(on the JSON backend, replaying the import reads it as one journal line
+until the next compaction). The import is one all-or-nothing write: if
+reading the file fails part way, nothing is added.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from .catalog import make_video
+from .storage import get_storage
+from .urls import canonical_url, parse_youtube_urls
+
+REQUIRED_FIELDS = ("category", "title", "url")
+# Fields that must be strings when present (JSONL rows can hold any JSON value)
+TEXT_FIELDS = ("category", "title", "url", "description", "added_date")
+# How many rejected rows to keep in the report (all are counted)
+MAX_REJECTIONS = 1000
+# Rows whose URLs are parsed together
+BATCH_SIZE = 1000
+
+
+def read_rows(path, fmt=None):
+    """Yield (line number, row dict) from a CSV or JSONL file."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_num, {"_error": f"invalid JSON: {e.msg}"}
+                        continue
+                    if not isinstance(row, dict):
+                        row = {"_error": "not a JSON object", "value": row}
+                    yield line_num, row
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.rejections = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def reject(self, line_num, reason, row):
+        self.rejected += 1
+        if len(self.rejections) < MAX_REJECTIONS:
+            self.rejections.append({"line": line_num, "reason": reason, "row": row})
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.rows} rows in {self.elapsed:.2f}s ({self.rows_per_second:,.0f} rows/s): "
+            f"{self.accepted} added, {self.duplicates} duplicates skipped, {self.rejected} rejected"
+        )
+
+
+def clean_rows(rows, report, default_category=None):
+    """Rows that have every required field and text where text belongs, with whitespace stripped."""
+    for line_num, row in rows:
+        report.rows += 1
+        if "_error" in row:
+            report.reject(line_num, row["_error"], row)
+            continue
+
+        # csv gives None for missing cells and a None key for extra ones
+        row = {key: value.strip() if isinstance(value, str) else value
+               for key, value in row.items() if key}
+        if default_category and not row.get("category"):
+            row["category"] = default_category
+        missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+        if missing:
+            report.reject(line_num, f"missing {', '.join(missing)}", row)
+            continue
+        wrong = [field for field in TEXT_FIELDS if row.get(field) is not None and not isinstance(row[field], str)]
+        tags = row.get("tags")
+        if tags is not None and not (
+            isinstance(tags, str) or isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)
+        ):
+            wrong.append("tags")
+        if wrong:
+            report.reject(line_num, f"not text: {', '.join(wrong)}", row)
+            continue
+        yield line_num, row
+
+
+def validate_rows(rows, known_ids, report, default_category=None):
+    """
+    Turn raw rows into (category, video) pairs, skipping invalid rows and
+    video IDs already in known_ids (which is updated as rows are accepted).
+    """
+    rows = clean_rows(rows, report, default_category)
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            return
+        parsed_urls = parse_youtube_urls([row["url"] for _, row in batch])
+
+        for (line_num, row), parsed in zip(batch, parsed_urls):
+            if not parsed or not parsed.video_id:
+                report.reject(line_num, "not a YouTube video URL", row)
+                continue
+            video_id = parsed.video_id
+            if video_id in known_ids:
+                report.duplicates += 1
+                continue
+            known_ids.add(video_id)
+
+            video = make_video(row["title"], canonical_url(video_id, parsed.start), video_id,
+                               row.get("description") or "", row.get("tags") or "")
+            if row.get("added_date"):
+                video["added_date"] = row["added_date"]
+            report.accepted += 1
+            yield row["category"], video
+
+
+def import_file(path, storage=None, fmt=None, default_category=None):
+    """Import one file in a single all-or-nothing write; returns an ImportReport."""
+    storage = storage or get_storage()
+    report = ImportReport()
+    known_ids = set(storage.load_videos()["by_video_id"])
+    storage.add_videos(validate_rows(read_rows(path, fmt), known_ids, report, default_category))
+    report.finish()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the file extension")
+    parser.add_argument("--category", help="category for rows that don't have one")
+    parser.add_argument("--rejects", help="write rejected rows to this JSONL file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+
+    try:
+        report = import_file(args.path, fmt=args.format, default_category=args.category)
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"import failed, nothing was added: {e}", file=sys.stderr)
+        return 1
+    print(report.summary())
+    for rejection in report.rejections[:20]:
+        print(f"  line {rejection['line']}: {rejection['reason']}", file=sys.stderr)
+    if args.rejects:
+        with open(args.rejects, 'w', encoding='utf-8') as f:
+            for rejection in report.rejections:
+                f.write(json.dumps(rejection, ensure_ascii=False) + "\n")
+    return 0 if report.accepted or not report.rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
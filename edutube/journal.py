@@ -0,0 +1,200 @@
+"""
+Append-only journal with atomic snapshot compaction and file locking.
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from .metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Journal size that triggers folding it back into the snapshot
+COMPACT_BYTES = 256 * 1024
+
+# Read once: os.umask can only be read by setting it, which would race other threads creating files
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+_thread_lock = threading.RLock()
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive lock shared by threads and processes using the same lock file."""
+    with _thread_lock, open(lock_path, "a+") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_json(filename, data):
+    """Write to a temp file next to filename, then rename it over the original."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            # mkstemp creates the file as 0600; keep the mode a plain open() would give
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), 0o666 & ~UMASK)
+            # Compact, and via dumps: json.dump and indent fall back to the pure-Python encoder
+            f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class JournaledFile:
+    """
+    A JSON snapshot plus an append-only journal of operations on it.
+    Writers append one line per change under a file lock; once the journal
+    grows past COMPACT_BYTES it is folded into a fresh snapshot.
+    apply_op must be idempotent: a crash between writing the snapshot and
+    truncating the journal replays those operations once more.
+    normalize brings a freshly read (or empty) snapshot into the shape
+    apply_op expects. With auto_compact off, appends never compact; the
+    owner checks needs_compaction() and calls compact() when convenient.
+    """
+
+    def __init__(self, path, apply_op, normalize=lambda data: data, compact_bytes=COMPACT_BYTES,
+                 auto_compact=True):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.lock_path = path + ".lock"
+        self.apply_op = apply_op
+        self.normalize = normalize
+        self.compact_bytes = compact_bytes
+        self.auto_compact = auto_compact
+
+    def _read_snapshot(self):
+        data = {}
+        if os.path.exists(self.path):
+            with metrics.span("json.load"), open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                metrics.count("bytes_read", f.tell())
+        return self.normalize(data)
+
+    def _replay(self, data):
+        if not os.path.exists(self.journal_path):
+            return data
+        with metrics.span("journal.replay"), open(self.journal_path, 'r', encoding='utf-8') as f:
+            metrics.count("bytes_read", os.fstat(f.fileno()).st_size)
+            for line in f:
+                # A line without its newline is a write still in progress (or torn by a crash)
+                if not line.endswith("\n"):
+                    break
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn line that a later append was written after; skip it
+                    metrics.count("journal.bad_lines")
+                    continue
+                for op in op["ops"] if op.get("op") == "batch" else (op,):
+                    self.apply_op(data, op)
+        return data
+
+    def load(self):
+        """Snapshot plus journal, read under the lock so a compaction can't split them."""
+        with file_lock(self.lock_path):
+            return self._load()
+
+    def _load(self):
+        return self._replay(self._read_snapshot())
+
+    def needs_compaction(self):
+        try:
+            return os.path.getsize(self.journal_path) >= self.compact_bytes
+        except FileNotFoundError:
+            return False
+
+    def append(self, op):
+        self.append_many([op])
+
+    def append_many(self, ops):
+        """
+        Append a batch of operations under one lock and one fsync; returns how many.
+        The batch is written as a single journal line, so it applies all or
+        nothing: if ops raises part way, or the process dies, the partial line
+        is discarded.
+        """
+        count = 0
+        with metrics.span("journal.append"), file_lock(self.lock_path):
+            self._trim_torn_tail()
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                start = f.tell()
+                try:
+                    for op in ops:
+                        f.write((',' if count else '{"op":"batch","ops":[') + json.dumps(op, ensure_ascii=False))
+                        count += 1
+                    if count:
+                        f.write("]}\n")
+                except BaseException:
+                    f.truncate(start)
+                    raise
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+            metrics.count("bytes_written", size - start)
+            if self.auto_compact and size >= self.compact_bytes:
+                self._compact_locked()
+        return count
+
+    def _trim_torn_tail(self):
+        """Cut a line left half-written by a crash, so the next append starts a fresh line."""
+        try:
+            f = open(self.journal_path, 'rb+')
+        except FileNotFoundError:
+            return
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            while pos > 0:
+                start = max(0, pos - 4096)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline >= 0:
+                    pos = start + newline + 1
+                    break
+                pos = start
+            if pos < end:
+                f.truncate(pos)
+
+    def compact(self):
+        with file_lock(self.lock_path):
+            self._compact_locked()
+
+    def replace(self, data):
+        """Overwrite the whole file, discarding the journal."""
+        with file_lock(self.lock_path):
+            atomic_write_json(self.path, data)
+            metrics.count("bytes_written", os.path.getsize(self.path))
+            self._truncate_journal()
+
+    def _compact_locked(self):
+        with metrics.span("journal.compact"):
+            atomic_write_json(self.path, self._load())
+            metrics.count("bytes_written", os.path.getsize(self.path))
+            self._truncate_journal()
+
+    def _truncate_journal(self):
+        if os.path.exists(self.journal_path):
+            open(self.journal_path, 'w').close()
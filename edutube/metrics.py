@@ -0,0 +1,136 @@
+"""
+Lightweight timing spans and counters for the hot paths.
+
+Off unless EDUTUBE_METRICS is set ("1", or a file path to also write
+snapshots to). While off, span() hands back one shared no-op context
+manager and count() returns immediately, so instrumented code pays only
+an attribute lookup and a call.
+
+    with metrics.span("search"):
+        ...
+    metrics.count("bytes_read", size)
+
+With a file configured, flush() rewrites it as JSON at most once every
+FLUSH_INTERVAL seconds.
+"""
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# Least time between two metrics file writes, in seconds
+FLUSH_INTERVAL = 5.0
+
+_disabled_span = nullcontext()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    Per-process span timings (count, total, max, last) and counters,
+    shared by every session.
+    """
+
+    def __init__(self, enabled=False, path=None):
+        self.enabled = enabled
+        self.path = path
+        self.started = time.time()
+        self._spans = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    @classmethod
+    def from_env(cls):
+        setting = os.environ.get("EDUTUBE_METRICS", "")
+        if setting.lower() in ("", "0", "false", "off"):
+            return cls()
+        return cls(enabled=True, path=None if setting.lower() in ("1", "true", "on") else setting)
+
+    def span(self, name):
+        """Context manager timing its block under name."""
+        if not self.enabled:
+            return _disabled_span
+        return _Span(self, name)
+
+    def start(self, name):
+        """Begin a span that can't be a with block; pass the result to stop()."""
+        return (name, time.perf_counter()) if self.enabled else None
+
+    def stop(self, token):
+        if token is not None:
+            self.record(token[0], time.perf_counter() - token[1])
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                self._spans[name] = [1, seconds, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+                stats[3] = seconds
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self):
+        """{"spans": {name: {count, total_ms, mean_ms, max_ms, last_ms}}, "counters": {...}}."""
+        with self._lock:
+            spans = {
+                name: {
+                    "count": n,
+                    "total_ms": round(total * 1000, 3),
+                    "mean_ms": round(total / n * 1000, 3),
+                    "max_ms": round(worst * 1000, 3),
+                    "last_ms": round(last * 1000, 3),
+                }
+                for name, (n, total, worst, last) in sorted(self._spans.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {
+            "pid": os.getpid(),
+            "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "spans": spans,
+            "counters": counters,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+        self.started = time.time()
+
+    def flush(self, force=False):
+        """Write snapshot() to the metrics file, if one is set and it is due."""
+        if not (self.enabled and self.path):
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        # Imported here: journal.py itself reports to metrics
+        from .journal import atomic_write_json
+        atomic_write_json(self.path, self.snapshot())
+
+
+metrics = Metrics.from_env()
@@ -0,0 +1,28 @@
+"""
+Notes model: {video_id: {"notes": {key: note}, "video_title": ...}}.
+"""
+from .catalog import legacy_key, new_key, now
+
+
+def make_note(text):
+    return {"key": new_key(), "text": text, "timestamp": now()}
+
+
+def normalize_notes(notes_data):
+    """Notes shape: {video_id: {"notes": {key: note}, "video_title": ...}}."""
+    for video_id, entry in notes_data.items():
+        if isinstance(entry["notes"], list):
+            keyed = {}
+            for position, note in enumerate(entry["notes"]):
+                note.setdefault("key", legacy_key(video_id, position, note["timestamp"]))
+                keyed[note["key"]] = note
+            entry["notes"] = keyed
+    return notes_data
+
+
+def apply_note_op(notes_data, op):
+    if op["op"] == "add":
+        entry = notes_data.setdefault(op["video_id"], {"notes": {}, "video_title": op["video_title"]})
+        entry["notes"][op["note"]["key"]] = op["note"]
+    elif op["op"] == "delete":
+        notes_data.get(op["video_id"], {"notes": {}})["notes"].pop(op["key"], None)
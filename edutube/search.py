@@ -0,0 +1,515 @@
+"""
+Search engine: inverted token index with trigram typo matching.
+Videos are ranked with BM25F; notes with the fuzzy calculate_search_score.
+"""
+from bisect import bisect_left, insort
+from collections import OrderedDict, defaultdict
+from difflib import SequenceMatcher
+import heapq
+import math
+import threading
+
+from .metrics import metrics
+
+# Field weights used when combining per-field scores (BM25F boosts for videos)
+FIELD_WEIGHTS = {
+    "title": 1.0,
+    "description": 0.5,
+    "tags": 0.5,
+    "category": 0.3,
+}
+NOTE_FIELD_WEIGHTS = {
+    "text": 1.0,
+    "video_title": 0.5,
+}
+SCORE_THRESHOLD = 20
+# Notes scored per query, best candidates first; matches past this are not scored
+MAX_CANDIDATES = 500
+# BM25F term saturation and length normalization (shared by every field)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Video scores are scaled so one plain title hit for every query word is 100;
+# weaker matches are dropped
+MIN_SCORE = 10
+# Minimum share of a query word's trigrams an indexed word must contain
+TRIGRAM_THRESHOLD = 0.4
+# Query words this short have too few trigrams to go by, so every indexed word
+# containing them is a candidate ("py" -> "happy"); single letters are not
+SUBSTRING_SCAN = range(2, 4)
+RESULT_CACHE_SIZE = 256
+# Semantic mode: nearest videos by vector added to the candidates, and the
+# weight of their similarity (0-1, scaled to 0-100) next to the lexical score
+SEMANTIC_CANDIDATES = 100
+SEMANTIC_WEIGHT = 0.5
+
+
+# Search Score Calculation (fuzzy matching)
+def calculate_search_score(query, text):
+    query = query.lower()
+    text = text.lower()
+
+    # Exact match
+    if query in text:
+        return 100
+
+    # SequenceMatcher score
+    ratio = SequenceMatcher(None, query, text).ratio()
+
+    # Word-based matching
+    query_words = query.split()
+    text_words = text.split()
+    word_matches = sum(1 for word in query_words if word in text_words)
+    word_score = (word_matches / len(query_words)) * 100 if query_words else 0
+
+    # Combined score
+    return max(ratio * 100, word_score)
+
+
+def tokenize(text):
+    """Split text into lowercase words, the same way the scorer does."""
+    return text.lower().split()
+
+
+def normalize_query(query):
+    return " ".join(tokenize(query))
+
+
+def trigrams(word):
+    """Character trigrams of a word, padded so short words still produce some."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def weighted_tokens(fields, weights):
+    """token -> summed weight of the fields (name -> text) it appears in."""
+    tokens = defaultdict(float)
+    for field, text in fields.items():
+        for token in set(tokenize(text)):
+            tokens[token] += weights[field]
+    return tokens
+
+
+class TokenIndex:
+    """
+    Inverted index from tokens to weighted postings (doc key -> weight),
+    plus each character trigram to the tokens containing it (for typo matches).
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.vocabulary = []
+        self.trigram_tokens = defaultdict(set)
+
+    def add_postings(self, key, tokens):
+        for token, weight in tokens.items():
+            if token not in self.postings:
+                insort(self.vocabulary, token)
+                for gram in trigrams(token):
+                    self.trigram_tokens[gram].add(token)
+            self.postings[token][key] = weight
+
+    def remove_postings(self, key, tokens):
+        for token in tokens:
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[token]
+                pos = bisect_left(self.vocabulary, token)
+                if pos < len(self.vocabulary) and self.vocabulary[pos] == token:
+                    del self.vocabulary[pos]
+                for gram in trigrams(token):
+                    self.trigram_tokens[gram].discard(token)
+                    if not self.trigram_tokens[gram]:
+                        del self.trigram_tokens[gram]
+
+    def prefix_tokens(self, prefix):
+        """All indexed tokens starting with prefix (including prefix itself)."""
+        pos = bisect_left(self.vocabulary, prefix)
+        while pos < len(self.vocabulary) and self.vocabulary[pos].startswith(prefix):
+            yield self.vocabulary[pos]
+            pos += 1
+
+    def similar_tokens(self, word):
+        """
+        Indexed tokens sharing enough trigrams with word, with their share.
+        Covers typos ("pyhton") and substrings ("thon") without scanning text.
+        """
+        grams = trigrams(word)
+        shared = defaultdict(int)
+        for gram in grams:
+            for token in self.trigram_tokens.get(gram, ()):
+                shared[token] += 1
+        similar = {}
+        for token, count in shared.items():
+            share = count / len(grams)
+            if share >= TRIGRAM_THRESHOLD:
+                similar[token] = share
+        return similar
+
+    def candidate_tokens(self, word):
+        """
+        Indexed tokens that may match word, with their share: prefix matches
+        (and, for short words, any token containing it) count fully, typo
+        matches by their trigram share.
+        """
+        similar = self.similar_tokens(word)
+        if len(word) in SUBSTRING_SCAN:
+            for token in self.vocabulary:
+                if word in token:
+                    similar[token] = 1.0
+        for token in self.prefix_tokens(word):
+            similar[token] = 1.0
+        return similar
+
+    def match(self, query, within=None):
+        """
+        doc key -> weight for docs sharing a word, word prefix or enough
+        trigrams with the query; within restricts it to a set of keys.
+        """
+        weights = defaultdict(float)
+        for word in set(tokenize(query)):
+            similar = self.candidate_tokens(word)
+            for token, share in similar.items():
+                postings = self.postings[token]
+                if within is not None and len(within) < len(postings):
+                    matches = ((key, postings[key]) for key in within if key in postings)
+                else:
+                    matches = postings.items()
+                for key, weight in matches:
+                    if within is None or key in within:
+                        weights[key] += weight * share
+        return weights
+
+
+class SearchIndex(TokenIndex):
+    """
+    Index over video title, description, tags and category, plus tag -> videos
+    postings for faceted filtering.
+    Postings hold per-field term counts (in FIELDS order) and the index keeps
+    each video's field lengths and their totals, so BM25F document frequencies
+    and average lengths are always current without a rebuild.
+    Shared by all sessions; version changes whenever a video is added or removed.
+    """
+
+    FIELDS = ("title", "description", "tags", "category")
+
+    def __init__(self):
+        super().__init__()
+        self.docs = {}
+        self.doc_lengths = {}
+        self.length_totals = [0] * len(self.FIELDS)
+        self.category_docs = defaultdict(set)
+        self.tag_docs = defaultdict(set)
+        self.version = 0
+        self._lock = threading.RLock()
+        # (normalized query, version, top_k, tags, semantic) -> (results, matched keys),
+        # least recently used first
+        self._results = OrderedDict()
+        # VectorIndex once enable_semantic() has run
+        self.vectors = None
+
+    @classmethod
+    def from_catalog(cls, videos_data):
+        index = cls()
+        for category, videos in videos_data["categories"].items():
+            for video in videos.values():
+                index._add_video(category, video)
+        return index
+
+    def _term_counts(self, category, video):
+        """(token -> per-field counts, per-field lengths), both in FIELDS order."""
+        texts = (video["title"], video.get("description", ""), " ".join(video.get("tags", [])), category)
+        counts = {}
+        lengths = []
+        for field, text in enumerate(texts):
+            words = tokenize(text)
+            lengths.append(len(words))
+            for word in words:
+                if word not in counts:
+                    counts[word] = [0] * len(texts)
+                counts[word][field] += 1
+        return {token: tuple(n) for token, n in counts.items()}, tuple(lengths)
+
+    def add_video(self, category, video):
+        with self._lock:
+            self._add_video(category, video)
+            self.version += 1
+
+    def rebuild(self, videos_data):
+        """
+        Index videos_data from scratch to the side, then swap it in at once,
+        so searches keep using the old index until the new one is complete.
+        """
+        fresh = SearchIndex.from_catalog(videos_data)
+        if self.vectors is not None:
+            encoder = self.vectors.encoder
+            # A fitted encoder carries the old document frequencies
+            fresh.enable_semantic(type(encoder)(encoder.dim) if hasattr(encoder, "fit") else encoder)
+        with self._lock:
+            for name in ("postings", "vocabulary", "trigram_tokens", "docs", "doc_lengths",
+                         "length_totals", "category_docs", "tag_docs", "vectors"):
+                setattr(self, name, getattr(fresh, name))
+            self._results.clear()
+            self.version += 1
+
+    def remove_video(self, key):
+        with self._lock:
+            self._remove_video(key)
+            self.version += 1
+
+    def _add_video(self, category, video):
+        key = video["key"]
+        if key in self.docs:
+            self._remove_video(key)
+        self.docs[key] = (category, video)
+        self.category_docs[category].add(key)
+        for tag in video.get("tags", []):
+            self.tag_docs[tag].add(key)
+        counts, lengths = self._term_counts(category, video)
+        self.add_postings(key, counts)
+        self.doc_lengths[key] = lengths
+        self.length_totals = [total + n for total, n in zip(self.length_totals, lengths)]
+        if self.vectors is not None:
+            self.vectors.add_video(video)
+
+    def _remove_video(self, key):
+        if key not in self.docs:
+            return
+        category, video = self.docs.pop(key)
+        self.category_docs[category].discard(key)
+        if not self.category_docs[category]:
+            del self.category_docs[category]
+        for tag in video.get("tags", []):
+            self.tag_docs[tag].discard(key)
+            if not self.tag_docs[tag]:
+                del self.tag_docs[tag]
+
+        self.remove_postings(key, self._term_counts(category, video)[0])
+        lengths = self.doc_lengths.pop(key)
+        self.length_totals = [total - n for total, n in zip(self.length_totals, lengths)]
+        if self.vectors is not None:
+            self.vectors.remove_video(key)
+
+    def idf(self, token):
+        df = len(self.postings.get(token, ()))
+        n = len(self.docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def bm25(self, query, within=None):
+        """
+        key -> BM25F score for every video sharing a word, word prefix or enough
+        trigrams with the query; within restricts it to a set of keys.
+        A query word counts once per video, through its best matching token,
+        and prefix/typo matches are scaled by their trigram share.
+        """
+        if not self.docs:
+            return {}
+        n = len(self.docs)
+        boosts = [FIELD_WEIGHTS[field] for field in self.FIELDS]
+        # A field of length l is normalized by (1 - b) + b * l / average length
+        slopes = [BM25_B * n / total if total else 0.0 for total in self.length_totals]
+        base = 1 - BM25_B
+        lengths = self.doc_lengths
+
+        scores = defaultdict(float)
+        best_possible = 0.0
+        for word in set(tokenize(query)):
+            similar = self.candidate_tokens(word)
+
+            word_scores = {}
+            word_best = 0.0
+            for token, share in similar.items():
+                postings = self.postings[token]
+                weight = share * self.idf(token)
+                word_best = max(word_best, weight)
+                if within is not None and len(within) < len(postings):
+                    matches = ((key, postings[key]) for key in within if key in postings)
+                else:
+                    matches = postings.items()
+                for key, counts in matches:
+                    if within is not None and key not in within:
+                        continue
+                    tf = 0.0
+                    for boost, count, slope, length in zip(boosts, counts, slopes, lengths[key]):
+                        if count:
+                            tf += boost * count / (base + slope * length)
+                    score = weight * tf * (BM25_K1 + 1) / (BM25_K1 + tf)
+                    if score > word_scores.get(key, 0.0):
+                        word_scores[key] = score
+            for key, score in word_scores.items():
+                scores[key] += score
+            best_possible += word_best
+
+        # Scale so a single plain title occurrence of every word scores 100
+        scale = 100 / best_possible if best_possible else 0.0
+        return {key: score * scale for key, score in scores.items()}
+
+    def enable_semantic(self, encoder=None):
+        """
+        Build the vector index for semantic search (once); False if NumPy
+        is not installed.
+        """
+        # Imported here: semantic.py builds on this module
+        from . import semantic
+        if not semantic.available():
+            return False
+        # Built from a snapshot without holding the lock, so searches go on meanwhile
+        with self._lock:
+            if self.vectors is not None:
+                return True
+            docs = dict(self.docs)
+        with metrics.span("semantic.build"):
+            vectors = semantic.VectorIndex.from_docs(docs, encoder)
+        with self._lock:
+            if self.vectors is None:
+                # Catch up with videos added or removed during the build
+                for key in docs.keys() - self.docs.keys():
+                    vectors.remove_video(key)
+                vectors.add_videos([video for key, (_, video) in self.docs.items()
+                                    if key not in docs or docs[key][1] is not video])
+                self.vectors = vectors
+        return True
+
+    # The facet helpers take the lock and return copies: index jobs change the
+    # postings in place from another thread
+
+    def with_tags(self, tags):
+        """Keys of the videos carrying every one of tags, smallest postings first."""
+        with self._lock:
+            postings = sorted((self.tag_docs.get(tag, set()) for tag in tags), key=len)
+            keys = set(postings[0]) if postings else set()
+            for docs in postings[1:]:
+                keys &= docs
+        return keys
+
+    def category_keys(self, category):
+        """Keys of the videos in category."""
+        with self._lock:
+            return set(self.category_docs.get(category, ()))
+
+    def tag_counts(self, keys=None):
+        """
+        [(tag, count)] most common first, over keys (or every video).
+        Without keys the counts are just the postings sizes.
+        """
+        keys = None if keys is None else set(keys)
+        with self._lock:
+            if keys is None:
+                counts = {tag: len(docs) for tag, docs in self.tag_docs.items()}
+            else:
+                counts = {tag: len(docs & keys) for tag, docs in self.tag_docs.items()}
+        return sorted(((tag, n) for tag, n in counts.items() if n), key=lambda item: (-item[1], item[0]))
+
+    def search(self, query, top_k=20, tags=(), semantic=False):
+        """
+        Best matches for query, restricted to videos carrying all of tags.
+        semantic also ranks by vector similarity (after enable_semantic()).
+        """
+        return self.search_with_matches(query, top_k, tags, semantic)[0]
+
+    def search_with_matches(self, query, top_k=20, tags=(), semantic=False):
+        """
+        (search() results, keys of every video that matched), so facets can
+        count all matches rather than only the top_k shown.
+        """
+        query = normalize_query(query)
+        tags = tuple(sorted(tags))
+        semantic = semantic and self.vectors is not None
+        cache_key = (query, self.version, top_k, tags, semantic)
+
+        with self._lock:
+            if cache_key in self._results:
+                self._results.move_to_end(cache_key)
+                metrics.count("search.cache_hits")
+                return self._results[cache_key]
+            metrics.count("search.cache_misses")
+
+            within = self.with_tags(tags) if tags else None
+            scores = self.bm25(query, within=within)
+
+            if semantic:
+                with metrics.span("semantic.search"):
+                    for key, similarity in self.vectors.search(query, SEMANTIC_CANDIDATES, within):
+                        scores[key] = scores.get(key, 0.0) + SEMANTIC_WEIGHT * 100 * similarity
+
+            matched = frozenset(key for key, score in scores.items() if score > MIN_SCORE)
+            best = heapq.nlargest(top_k, ((scores[key], key) for key in matched))
+            results = []
+            for score, key in best:
+                category, video = self.docs[key]
+                results.append({
+                    "video": video,
+                    "category": category,
+                    "score": score
+                })
+
+            self._results[cache_key] = (results, matched)
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return results, matched
+
+
+class NoteIndex(TokenIndex):
+    """
+    Index over note text (and the title of the video each note is on).
+    Updated as notes are saved or deleted; shared by all sessions.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.notes = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_notes(cls, notes_data):
+        index = cls()
+        for video_id, entry in notes_data.items():
+            for note in entry["notes"].values():
+                index._add_note(video_id, entry.get("video_title", ""), note)
+        return index
+
+    def _field_tokens(self, video_title, note):
+        return weighted_tokens({"text": note["text"], "video_title": video_title}, NOTE_FIELD_WEIGHTS)
+
+    def add_note(self, video_id, video_title, note):
+        with self._lock:
+            self._add_note(video_id, video_title, note)
+
+    def rebuild(self, notes_data):
+        """Index notes_data from scratch to the side, then swap it in at once."""
+        fresh = NoteIndex.from_notes(notes_data)
+        with self._lock:
+            for name in ("postings", "vocabulary", "trigram_tokens", "notes"):
+                setattr(self, name, getattr(fresh, name))
+
+    def remove_note(self, key):
+        with self._lock:
+            if key in self.notes:
+                _, video_title, note = self.notes.pop(key)
+                self.remove_postings(key, self._field_tokens(video_title, note))
+
+    def _add_note(self, video_id, video_title, note):
+        self.notes[note["key"]] = (video_id, video_title, note)
+        self.add_postings(note["key"], self._field_tokens(video_title, note))
+
+    def search(self, query, top_k=10):
+        query = normalize_query(query)
+        results = []
+        with self._lock:
+            weights = self.match(query)
+            for key in heapq.nlargest(MAX_CANDIDATES, weights, key=weights.get):
+                video_id, video_title, note = self.notes[key]
+                score = (
+                    calculate_search_score(query, note["text"]) * NOTE_FIELD_WEIGHTS["text"]
+                    + calculate_search_score(query, video_title) * NOTE_FIELD_WEIGHTS["video_title"]
+                )
+                if score > SCORE_THRESHOLD:
+                    results.append({
+                        "note": note,
+                        "video_id": video_id,
+                        "video_title": video_title,
+                        "score": score
+                    })
+        return heapq.nlargest(top_k, results, key=lambda x: x["score"])
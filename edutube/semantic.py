@@ -0,0 +1,245 @@
+"""
+Vector index for the optional semantic search mode.
+
+Each video gets one vector from its title, description and tags, encoded
+by a pluggable local encoder and stored as a row of a NumPy matrix; a
+query is answered with one matrix-vector product and a partial sort.
+NumPy is optional: without it available() is False and search stays
+purely lexical.
+
+The default HashingEncoder needs no model download. It hashes words and
+their character trigrams into a fixed number of buckets with TF-IDF
+weights, so it matches shared words and word forms ("derivative",
+"derivatives") rather than meaning. A real embedding model plugs in as
+any object with a dim attribute and an encode(texts) method returning
+L2-normalized float32 rows.
+"""
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # semantic mode is unavailable
+    np = None
+
+from .search import FIELD_WEIGHTS, tokenize, trigrams
+
+# Buckets per vector: 10,000 videos take about 20 MB at 512
+DEFAULT_DIM = 512
+# Weight of a word's trigrams relative to the word itself
+TRIGRAM_WEIGHT = 0.3
+# Videos encoded per batch, bounding the temporary arrays
+BATCH_SIZE = 4096
+
+
+def available():
+    return np is not None
+
+
+def _normalize(rows):
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return rows / norms
+
+
+class HashingEncoder:
+    """
+    Hashed bag of words and character trigrams with TF-IDF weights.
+    Document frequencies are learned by fit() as videos are indexed.
+    Each distinct word is hashed once; texts are then encoded in batches
+    with NumPy instead of word by word.
+    """
+
+    def __init__(self, dim=DEFAULT_DIM):
+        self.dim = dim
+        self.df = np.zeros(dim, dtype=np.float32)
+        self.n_docs = 0
+        # word -> id; id -> its bucket followed by its trigram buckets
+        self._ids = {}
+        self._buckets = []
+        self._table = None
+
+    def _hash_word(self, word):
+        """The word's bucket followed by its trigram buckets."""
+        buckets = [zlib.crc32(word.encode()) % self.dim]
+        buckets += [zlib.crc32(b"#" + gram.encode()) % self.dim for gram in trigrams(word)]
+        return buckets
+
+    def _word_id(self, word):
+        word_id = self._ids.get(word)
+        if word_id is None:
+            word_id = self._ids[word] = len(self._buckets)
+            self._buckets.append(self._hash_word(word))
+            self._table = None
+        return word_id
+
+    def _word_table(self):
+        """(offsets, lengths, buckets, weights) arrays over every known word."""
+        if self._table is None:
+            lengths = np.fromiter(map(len, self._buckets), dtype=np.int64, count=len(self._buckets))
+            offsets = np.zeros(len(lengths), dtype=np.int64)
+            np.cumsum(lengths[:-1], out=offsets[1:])
+            buckets = np.fromiter((b for word in self._buckets for b in word), dtype=np.int64)
+            weights = np.full(len(buckets), TRIGRAM_WEIGHT)
+            weights[offsets] = 1.0
+            self._table = (offsets, lengths, buckets, weights)
+        return self._table
+
+    def _features(self, texts, learn=False):
+        """
+        (row, bucket, weight) arrays for the words and word trigrams of texts.
+        learn adds new words to the word table; otherwise (queries) they are
+        hashed on the fly, so queries neither grow nor invalidate the table.
+        """
+        word_ids = []
+        counts = []
+        unknown = []
+        known = self._ids.get
+        for row, text in enumerate(texts):
+            words = tokenize(text)
+            ids = list(map(known, words))
+            if None in ids:
+                if learn:
+                    ids = list(map(self._word_id, words))
+                else:
+                    unknown += [(row, word) for word, word_id in zip(words, ids) if word_id is None]
+                    ids = [word_id for word_id in ids if word_id is not None]
+            word_ids += ids
+            counts.append(len(ids))
+        offsets, lengths, buckets, weights = self._word_table()
+
+        word_ids = np.array(word_ids, dtype=np.int64)
+        spans = lengths[word_ids]
+        # Positions of every word's buckets in the flat table, in one shot
+        ends = np.cumsum(spans)
+        positions = np.arange(ends[-1] if len(ends) else 0) + np.repeat(offsets[word_ids] - ends + spans, spans)
+        rows = np.repeat(np.repeat(np.arange(len(counts)), counts), spans)
+        buckets, weights = buckets[positions], weights[positions]
+
+        if unknown:
+            extra_rows, extra_buckets, extra_weights = [], [], []
+            for row, word in unknown:
+                hashed = self._hash_word(word)
+                extra_rows += [row] * len(hashed)
+                extra_buckets += hashed
+                extra_weights += [1.0] + [TRIGRAM_WEIGHT] * (len(hashed) - 1)
+            rows = np.concatenate([rows, np.array(extra_rows, dtype=np.int64)])
+            buckets = np.concatenate([buckets, np.array(extra_buckets, dtype=np.int64)])
+            weights = np.concatenate([weights, np.array(extra_weights)])
+        return rows, buckets, weights
+
+    def fit(self, texts):
+        texts = list(texts)
+        rows, buckets, _ = self._features(texts, learn=True)
+        counts = np.bincount(rows * self.dim + buckets, minlength=len(texts) * self.dim)
+        self.df += (counts.reshape(len(texts), self.dim) > 0).sum(axis=0)
+        self.n_docs += len(texts)
+
+    def encode(self, texts):
+        rows, buckets, weights = self._features(texts)
+        tf = np.bincount(rows * self.dim + buckets, weights=weights, minlength=len(texts) * self.dim)
+        idf = np.log((1 + self.n_docs) / (1 + self.df)) + 1
+        return _normalize((np.log1p(tf).reshape(len(texts), self.dim) * idf).astype(np.float32))
+
+
+class VectorIndex:
+    """
+    Row per video in a matrix that doubles in size as it fills.
+    Deleted rows are zeroed and reused, so their similarity is always 0.
+    """
+
+    def __init__(self, encoder=None, capacity=1024):
+        self.encoder = encoder or HashingEncoder()
+        self.matrix = np.zeros((capacity, self.encoder.dim), dtype=np.float32)
+        self.keys = [None] * capacity
+        self.rows = {}
+        self.free = []
+        self.size = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_docs(cls, docs, encoder=None):
+        """Index {key: (category, video)} in one batch."""
+        index = cls(encoder, capacity=max(1024, len(docs)))
+        index.add_videos([video for _, video in docs.values()])
+        return index
+
+    def _fields(self, video):
+        return {
+            "title": video["title"],
+            "description": video.get("description", ""),
+            "tags": " ".join(video.get("tags", [])),
+        }
+
+    def encode_videos(self, videos):
+        """Weighted sum of the per-field vectors, normalized."""
+        fields = [self._fields(video) for video in videos]
+        total = np.zeros((len(videos), self.encoder.dim), dtype=np.float32)
+        for field in ("title", "description", "tags"):
+            total += FIELD_WEIGHTS[field] * self.encoder.encode([f[field] for f in fields])
+        return _normalize(total)
+
+    def add_videos(self, videos):
+        if not videos:
+            return
+        with self._lock:
+            if hasattr(self.encoder, "fit"):
+                for start in range(0, len(videos), BATCH_SIZE):
+                    batch = videos[start:start + BATCH_SIZE]
+                    self.encoder.fit([" ".join(self._fields(video).values()) for video in batch])
+            for start in range(0, len(videos), BATCH_SIZE):
+                batch = videos[start:start + BATCH_SIZE]
+                for video, vector in zip(batch, self.encode_videos(batch)):
+                    self.remove_video(video["key"])
+                    row = self._free_row()
+                    self.matrix[row] = vector
+                    self.keys[row] = video["key"]
+                    self.rows[video["key"]] = row
+
+    def add_video(self, video):
+        self.add_videos([video])
+
+    def remove_video(self, key):
+        with self._lock:
+            row = self.rows.pop(key, None)
+            if row is not None:
+                self.matrix[row] = 0
+                self.keys[row] = None
+                self.free.append(row)
+
+    def _free_row(self):
+        if self.free:
+            return self.free.pop()
+        if self.size == len(self.keys):
+            self.matrix = np.vstack([self.matrix, np.zeros_like(self.matrix)])
+            self.keys.extend([None] * self.size)
+        self.size += 1
+        return self.size - 1
+
+    def search_many(self, queries, top_k=20, within=None):
+        """
+        [(key, similarity)] best first for each query, from one matrix product.
+        within restricts the results to a set of keys.
+        """
+        with self._lock:
+            if within is None:
+                rows = np.arange(self.size)
+            else:
+                rows = np.fromiter((self.rows[key] for key in within if key in self.rows), dtype=np.int64)
+            if not len(rows) or not queries:
+                return [[] for _ in queries]
+            scores = self.matrix[rows] @ self.encoder.encode(list(queries)).T
+            keys = self.keys
+
+            results = []
+            for column in scores.T:
+                k = min(top_k, len(rows))
+                best = np.argpartition(-column, k - 1)[:k]
+                best = best[np.argsort(-column[best])]
+                results.append([
+                    (keys[rows[i]], float(column[i])) for i in best if column[i] > 0
+                ])
+        return results
+
+    def search(self, query, top_k=20, within=None):
+        return self.search_many([query], top_k, within)[0]
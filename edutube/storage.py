@@ -0,0 +1,421 @@
+"""
+Storage backends: journaled JSON files (default) or SQLite.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+
+from .catalog import apply_video_op, catalog_stats, index_catalog, normalize_catalog, parse_tags
+from .journal import JournaledFile
+from .metrics import metrics
+from .notes import apply_note_op, normalize_notes
+
+# Data Files
+DATA_FILE = "videos_data.json"
+NOTES_FILE = "video_notes.json"
+DB_FILE = "edu_tube.db"
+
+VIDEO_FIELDS = ("key", "title", "url", "video_id", "description", "tags", "added_date")
+
+
+def file_signature(filename):
+    """(mtime, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class FileCache:
+    """
+    Values derived from a file, shared by every session in the process.
+    An entry is reused while the file's mtime and size are unchanged.
+    Cached values are shared: callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename, name, compute, depends_on=()):
+        """compute() once per (filename, name) until filename or depends_on change."""
+        key = (os.path.abspath(filename), name)
+        # Read the signature first, so a write during compute() is seen next time
+        signature = tuple(file_signature(f) for f in (filename, *depends_on))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                metrics.count("file_cache.hits")
+                return entry[1]
+        metrics.count("file_cache.misses")
+        value = compute()
+        with self._lock:
+            self._entries[key] = (signature, value)
+        return value
+
+    def invalidate(self, filename):
+        path = os.path.abspath(filename)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+
+file_cache = FileCache()
+
+
+def _text_size(row):
+    """Characters of text in a SQLite row, counted as the bytes read for it."""
+    return sum(len(value) for value in row if isinstance(value, str))
+
+
+class JsonStorage:
+    """
+    Catalog and notes kept in two JSON files.
+    Changes are appended to a journal next to each file (see edutube/journal.py),
+    so a save costs O(change) and concurrent sessions don't overwrite each other.
+    """
+
+    def __init__(self, data_file=DATA_FILE, notes_file=NOTES_FILE, auto_compact=True):
+        self.data_file = data_file
+        self.notes_file = notes_file
+        self.videos = JournaledFile(data_file, apply_video_op, normalize_catalog, auto_compact=auto_compact)
+        self.notes = JournaledFile(notes_file, apply_note_op, normalize_notes, auto_compact=auto_compact)
+
+    def _cached(self, journaled, name, compute):
+        return file_cache.get(journaled.path, name, compute, depends_on=(journaled.journal_path,))
+
+    def _append(self, journaled, op):
+        journaled.append(op)
+        file_cache.invalidate(journaled.path)
+
+    def load_videos(self):
+        return self._cached(self.videos, "data", lambda: index_catalog(self.videos.load()))
+
+    def load_notes(self):
+        return self._cached(self.notes, "data", self.notes.load)
+
+    def stats(self):
+        return self._cached(self.videos, "stats", lambda: catalog_stats(self.load_videos()))
+
+    def iter_videos(self):
+        """(category, video) pairs, for streaming exports."""
+        for category, videos in self.load_videos()["categories"].items():
+            for video in videos.values():
+                yield category, video
+
+    def iter_notes(self):
+        """(video_id, video_title, note) triples, for streaming exports."""
+        for video_id, entry in self.load_notes().items():
+            for note in entry["notes"].values():
+                yield video_id, entry.get("video_title", ""), note
+
+    def add_video(self, category, video):
+        self._append(self.videos, {"op": "add", "category": category, "video": video})
+
+    def add_videos(self, items):
+        """Append (category, video) pairs as one journal batch; returns how many."""
+        count = self.videos.append_many(
+            {"op": "add", "category": category, "video": video} for category, video in items
+        )
+        file_cache.invalidate(self.videos.path)
+        return count
+
+    def delete_video(self, category, key):
+        self._append(self.videos, {"op": "delete", "category": category, "key": key})
+
+    def delete_videos(self, items):
+        """Delete (category, key) pairs as one journal batch; returns how many."""
+        count = self.videos.append_many(
+            {"op": "delete", "category": category, "key": key} for category, key in items
+        )
+        file_cache.invalidate(self.videos.path)
+        return count
+
+    def add_note(self, video_id, video_title, note):
+        self._append(self.notes, {"op": "add", "video_id": video_id, "video_title": video_title, "note": note})
+
+    def add_notes(self, items):
+        """Append (video_id, video_title, note) triples as one journal batch; returns how many."""
+        count = self.notes.append_many(
+            {"op": "add", "video_id": video_id, "video_title": video_title, "note": note}
+            for video_id, video_title, note in items
+        )
+        file_cache.invalidate(self.notes.path)
+        return count
+
+    def delete_note(self, video_id, key):
+        self._append(self.notes, {"op": "delete", "video_id": video_id, "key": key})
+
+    def clear(self):
+        """Remove every video and note."""
+        self.videos.replace({"categories": {}})
+        self.notes.replace({})
+        file_cache.invalidate(self.videos.path)
+        file_cache.invalidate(self.notes.path)
+
+    def signature(self):
+        """Changes whenever the stored videos or notes do, whichever process wrote them."""
+        return tuple(file_signature(f) for journaled in (self.videos, self.notes)
+                     for f in (journaled.path, journaled.journal_path))
+
+    def needs_compaction(self):
+        return self.videos.needs_compaction() or self.notes.needs_compaction()
+
+    def compact(self):
+        """Fold both journals into their snapshots."""
+        for journaled in (self.videos, self.notes):
+            journaled.compact()
+            file_cache.invalidate(journaled.path)
+
+
+class SqliteStorage:
+    """
+    Catalog and notes in a SQLite database.
+    Adds and deletes touch a single row instead of rewriting everything.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS videos (
+        id INTEGER PRIMARY KEY,
+        key TEXT NOT NULL UNIQUE,
+        category_id INTEGER NOT NULL REFERENCES categories(id),
+        title TEXT NOT NULL,
+        url TEXT NOT NULL,
+        video_id TEXT NOT NULL,
+        description TEXT NOT NULL DEFAULT '',
+        tags TEXT NOT NULL DEFAULT '',
+        added_date TEXT NOT NULL DEFAULT ''
+    );
+    CREATE INDEX IF NOT EXISTS idx_videos_category ON videos(category_id);
+    CREATE INDEX IF NOT EXISTS idx_videos_video_id ON videos(video_id);
+    CREATE INDEX IF NOT EXISTS idx_videos_added_date ON videos(added_date);
+    CREATE TABLE IF NOT EXISTS notes (
+        id INTEGER PRIMARY KEY,
+        key TEXT NOT NULL UNIQUE,
+        video_id TEXT NOT NULL,
+        video_title TEXT NOT NULL DEFAULT '',
+        text TEXT NOT NULL,
+        timestamp TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_notes_video_id ON notes(video_id);
+    """
+
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        # A connection per operation: Streamlit sessions run on different threads
+        conn = sqlite3.connect(self.db_file)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _category_id(self, conn, category):
+        conn.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category,))
+        return conn.execute("SELECT id FROM categories WHERE name = ?", (category,)).fetchone()[0]
+
+    def _insert_video(self, conn, category_id, video):
+        row = {field: video.get(field, "") for field in VIDEO_FIELDS}
+        # Tags are a list in memory and a comma separated string in the table
+        row["tags"] = ", ".join(video.get("tags", []))
+        conn.execute(
+            "INSERT INTO videos (category_id, key, title, url, video_id, description, tags, added_date) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET category_id = excluded.category_id, title = excluded.title, "
+            "url = excluded.url, video_id = excluded.video_id, description = excluded.description, "
+            "tags = excluded.tags, added_date = excluded.added_date",
+            (category_id, *(row[field] for field in VIDEO_FIELDS)),
+        )
+
+    def _insert_note(self, conn, video_id, video_title, note):
+        conn.execute(
+            "INSERT OR REPLACE INTO notes (key, video_id, video_title, text, timestamp) VALUES (?, ?, ?, ?, ?)",
+            (note["key"], video_id, video_title, note["text"], note["timestamp"]),
+        )
+
+    @contextmanager
+    def _write(self):
+        """Transaction that drops the cached reads once it is done."""
+        try:
+            with metrics.span("sqlite.write"), closing(self._connect()) as conn, conn:
+                yield conn
+        finally:
+            file_cache.invalidate(self.db_file)
+
+    def load_videos(self):
+        return file_cache.get(self.db_file, "videos", lambda: index_catalog(self._read_videos()))
+
+    def load_notes(self):
+        return file_cache.get(self.db_file, "notes", self._read_notes)
+
+    def stats(self):
+        return file_cache.get(self.db_file, "stats", self._read_stats)
+
+    def iter_videos(self):
+        """(category, video) pairs straight from a cursor, for streaming exports."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT c.name AS category, v.* FROM videos v "
+                "JOIN categories c ON c.id = v.category_id ORDER BY c.id, v.id"
+            )
+            size = 0
+            for row in rows:
+                video = {field: row[field] for field in VIDEO_FIELDS}
+                video["tags"] = parse_tags(video["tags"])
+                if metrics.enabled:
+                    size += _text_size(row)
+                yield row["category"], video
+            metrics.count("bytes_read", size)
+
+    def iter_notes(self):
+        """(video_id, video_title, note) triples straight from a cursor."""
+        with closing(self._connect()) as conn:
+            size = 0
+            for row in conn.execute("SELECT * FROM notes ORDER BY id"):
+                note = {"key": row["key"], "text": row["text"], "timestamp": row["timestamp"]}
+                if metrics.enabled:
+                    size += _text_size(row)
+                yield row["video_id"], row["video_title"], note
+            metrics.count("bytes_read", size)
+
+    def _read_videos(self):
+        data = {"categories": {}}
+        with metrics.span("sqlite.read_videos"):
+            for category, video in self.iter_videos():
+                data["categories"].setdefault(category, {})[video["key"]] = video
+        return data
+
+    def _read_notes(self):
+        notes_data = {}
+        with metrics.span("sqlite.read_notes"):
+            for video_id, video_title, note in self.iter_notes():
+                entry = notes_data.setdefault(video_id, {"notes": {}, "video_title": video_title})
+                entry["notes"][note["key"]] = note
+        return notes_data
+
+    def _read_stats(self):
+        with closing(self._connect()) as conn:
+            return {
+                "total_videos": conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0],
+                "total_categories": conn.execute("SELECT COUNT(*) FROM categories").fetchone()[0],
+            }
+
+    def add_video(self, category, video):
+        with self._write() as conn:
+            self._insert_video(conn, self._category_id(conn, category), video)
+
+    def add_videos(self, items):
+        """Insert (category, video) pairs in one transaction; returns how many."""
+        count = 0
+        category_ids = {}
+        with self._write() as conn:
+            for category, video in items:
+                if category not in category_ids:
+                    category_ids[category] = self._category_id(conn, category)
+                self._insert_video(conn, category_ids[category], video)
+                count += 1
+        return count
+
+    def _delete_video(self, conn, key):
+        row = conn.execute("SELECT category_id FROM videos WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM videos WHERE key = ?", (key,))
+        # Same as the JSON backend: a category disappears with its last video
+        conn.execute(
+            "DELETE FROM categories WHERE id = ? "
+            "AND NOT EXISTS (SELECT 1 FROM videos WHERE category_id = ?)",
+            (row["category_id"], row["category_id"]),
+        )
+
+    def delete_video(self, category, key):
+        with self._write() as conn:
+            self._delete_video(conn, key)
+
+    def delete_videos(self, items):
+        """Delete (category, key) pairs in one transaction; returns how many."""
+        count = 0
+        with self._write() as conn:
+            for _, key in items:
+                self._delete_video(conn, key)
+                count += 1
+        return count
+
+    def add_note(self, video_id, video_title, note):
+        with self._write() as conn:
+            self._insert_note(conn, video_id, video_title, note)
+
+    def add_notes(self, items):
+        """Insert (video_id, video_title, note) triples in one transaction; returns how many."""
+        count = 0
+        with self._write() as conn:
+            for video_id, video_title, note in items:
+                self._insert_note(conn, video_id, video_title, note)
+                count += 1
+        return count
+
+    def delete_note(self, video_id, key):
+        with self._write() as conn:
+            conn.execute("DELETE FROM notes WHERE key = ?", (key,))
+
+    def signature(self):
+        """Changes whenever the database does, whichever process wrote it."""
+        return file_signature(self.db_file)
+
+    def needs_compaction(self):
+        # Rows are updated in place; there is no journal to fold
+        return False
+
+    def clear(self):
+        """Remove every video and note."""
+        with self._write() as conn:
+            conn.execute("DELETE FROM notes")
+            conn.execute("DELETE FROM videos")
+            conn.execute("DELETE FROM categories")
+
+    def import_data(self, videos_data, notes_data):
+        """Bulk insert a whole catalog and its notes in one transaction."""
+        with self._write() as conn:
+            for category, videos in videos_data.get("categories", {}).items():
+                category_id = self._category_id(conn, category)
+                for video in videos.values():
+                    self._insert_video(conn, category_id, video)
+            for video_id, entry in notes_data.items():
+                for note in entry["notes"].values():
+                    self._insert_note(conn, video_id, entry.get("video_title", ""), note)
+
+
+def migrate_json_to_sqlite(data_file=DATA_FILE, notes_file=NOTES_FILE, db_file=DB_FILE):
+    """One-shot copy of the JSON files into a new SQLite database."""
+    if os.path.exists(db_file):
+        raise FileExistsError(f"{db_file} already exists, refusing to migrate over it")
+    source = JsonStorage(data_file, notes_file)
+    target = SqliteStorage(db_file)
+    target.import_data(source.load_videos(), source.load_notes())
+    return target
+
+
+def get_storage(auto_compact=True):
+    """
+    Pick the backend from EDUTUBE_STORAGE ("json" or "sqlite").
+    auto_compact=False leaves journal compaction to the caller (JSON only).
+    """
+    backend = os.environ.get("EDUTUBE_STORAGE", "json").lower()
+    if backend == "sqlite":
+        return SqliteStorage(os.environ.get("EDUTUBE_DB", DB_FILE))
+    if backend == "json":
+        return JsonStorage(auto_compact=auto_compact)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+if __name__ == "__main__":
+    # python -m edutube.storage  ->  migrate videos_data.json / video_notes.json to edu_tube.db
+    migrate_json_to_sqlite()
+    print(f"Migrated {DATA_FILE} and {NOTES_FILE} to {DB_FILE}")
@@ -0,0 +1,148 @@
+"""
+Local thumbnail store for offline deployments.
+"""
+import io
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are stored as downloaded
+    Image = None
+
+# Streamlit serves <app dir>/static at app/static when enableStaticServing is on
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(APP_DIR, "static")
+THUMBNAIL_DIR = os.path.join(STATIC_DIR, "thumbnails")
+THUMBNAIL_URL = "app/static/thumbnails/{video_id}.jpg"
+YOUTUBE_THUMBNAIL_URL = "https://img.youtube.com/vi/{video_id}/mqdefault.jpg"
+
+CARD_WIDTH = 320
+MAX_BYTES = 200 * 1024 * 1024
+
+
+def fetch_thumbnail(video_id, timeout=10):
+    """Download a thumbnail from YouTube; None if it can't be fetched."""
+    try:
+        with urllib.request.urlopen(YOUTUBE_THUMBNAIL_URL.format(video_id=video_id), timeout=timeout) as response:
+            return response.read()
+    except OSError:
+        return None
+
+
+def resize_thumbnail(image_bytes, width=CARD_WIDTH):
+    """Shrink to the card width and re-encode; unchanged without Pillow."""
+    if Image is None:
+        return image_bytes
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)))
+        out = io.BytesIO()
+        image.convert("RGB").save(out, format="JPEG", quality=80, optimize=True)
+        return out.getvalue()
+
+
+class ThumbnailStore:
+    """
+    On-disk thumbnail cache keyed by video_id, evicting least recently
+    used files once the directory grows past max_bytes.
+    fetcher(video_id) -> bytes or None, so it can be stubbed offline.
+    """
+
+    def __init__(self, directory=THUMBNAIL_DIR, fetcher=fetch_thumbnail,
+                 max_bytes=MAX_BYTES, width=CARD_WIDTH):
+        self.directory = directory
+        self.fetcher = fetcher
+        self.max_bytes = max_bytes
+        self.width = width
+        self._lock = threading.Lock()
+        # video_id -> file size, least recently used first
+        self._entries = OrderedDict()
+        self.total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith(".jpg"):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, video_id, size in sorted(files):
+            self._entries[video_id] = size
+            self.total_bytes += size
+
+    def path(self, video_id):
+        return os.path.join(self.directory, f"{video_id}.jpg")
+
+    def has(self, video_id):
+        with self._lock:
+            return self._known(video_id)
+
+    def _known(self, video_id):
+        """True if the file is cached, picking up files written by another process."""
+        if video_id in self._entries:
+            return True
+        try:
+            size = os.path.getsize(self.path(video_id))
+        except OSError:
+            return False
+        # e.g. fetched by python -m edutube.thumbnails while the app is running
+        self._entries[video_id] = size
+        self.total_bytes += size
+        self._evict(keep=video_id)
+        return True
+
+    def url(self, video_id):
+        """Local URL if the thumbnail is cached, YouTube's otherwise."""
+        with self._lock:
+            if not self._known(video_id):
+                return YOUTUBE_THUMBNAIL_URL.format(video_id=video_id)
+            self._entries.move_to_end(video_id)
+        return THUMBNAIL_URL.format(video_id=video_id)
+
+    def prefetch(self, video_id):
+        """Fetch and store a thumbnail once; True if it is available locally."""
+        if self.has(video_id):
+            return True
+        image_bytes = self.fetcher(video_id)
+        if not image_bytes:
+            return False
+        image_bytes = resize_thumbnail(image_bytes, self.width)
+
+        tmp_path = self.path(video_id) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, self.path(video_id))
+
+        with self._lock:
+            if video_id not in self._entries:
+                self.total_bytes += len(image_bytes)
+            self._entries[video_id] = len(image_bytes)
+            self._evict()
+        return True
+
+    def _evict(self, keep=None):
+        if keep is not None:
+            self._entries.move_to_end(keep)
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            video_id, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self.path(video_id))
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == "__main__":
+    # python -m edutube.thumbnails  ->  download every catalog thumbnail (before going offline)
+    from .storage import get_storage
+
+    store = ThumbnailStore()
+    data = get_storage().load_videos()
+    fetched = sum(
+        store.prefetch(video["video_id"])
+        for videos in data["categories"].values()
+        for video in videos.values()
+    )
+    print(f"{fetched} thumbnails available in {store.directory}")
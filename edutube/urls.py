@@ -0,0 +1,92 @@
+"""
+YouTube URL parsing.
+
+Handles youtu.be links, watch?v= (with v anywhere in the query string),
+/shorts/, /embed/, /live/ and /v/ paths, m./music./www. hosts,
+youtube-nocookie.com embeds and playlist links. Videos are stored under
+canonical_url(), the one form every player embeds.
+"""
+import re
+from collections import namedtuple
+from urllib.parse import parse_qsl
+
+VIDEO_ID = re.compile(r"[A-Za-z0-9_-]{11}")
+
+_URL = re.compile(
+    r"""
+    ^\s*(?:https?://)?(?:www\.|m\.|music\.)?
+    (?:
+        youtu\.be/(?P<short>[^/?#&]+)
+      | youtube(?:-nocookie)?\.com/
+        (?:
+            (?:shorts|embed|live|v)/(?P<path>[^/?#&]+)
+          | (?P<page>watch|playlist)
+        )
+    )
+    /?(?P<query>\?[^#\s]*)?(?P<fragment>\#\S*)?\s*$
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_DURATION = re.compile(r"(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?", re.IGNORECASE)
+
+YouTubeURL = namedtuple("YouTubeURL", ["video_id", "start", "playlist"])
+
+
+def parse_start(value):
+    """Seconds from a t=/start= value like "90", "90s" or "1h2m3s"; None if invalid."""
+    if not value:
+        return None
+    match = _DURATION.fullmatch(value)
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _from_match(match):
+    params = dict(parse_qsl((match["query"] or "")[1:]))
+    fragment = dict(parse_qsl((match["fragment"] or "")[1:]))
+
+    video_id = match["short"] or match["path"]
+    if match["page"] and match["page"].lower() == "watch":
+        video_id = params.get("v")
+    if video_id is not None and not VIDEO_ID.fullmatch(video_id):
+        return None
+
+    playlist = params.get("list")
+    if video_id is None and playlist is None:
+        return None
+    start = parse_start(params.get("t") or params.get("start") or fragment.get("t"))
+    return YouTubeURL(video_id, start, playlist)
+
+
+def parse_youtube_url(url):
+    """
+    YouTubeURL(video_id, start, playlist) for a YouTube link, or None.
+    video_id is None for playlist-only links; start is in seconds.
+    """
+    match = _URL.match(url)
+    return _from_match(match) if match else None
+
+
+def canonical_url(video_id, start=None):
+    """https://www.youtube.com/watch?v=<id>, with &t=<start>s when there is a start time."""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    return f"{url}&t={start}s" if start else url
+
+
+def parse_youtube_urls(urls):
+    """parse_youtube_url over a batch of URLs, for bulk ingest."""
+    match = _URL.match
+    return [_from_match(m) if (m := match(url)) else None for url in urls]
+
+
+def extract_video_id(url):
+    parsed = parse_youtube_url(url)
+    return parsed.video_id if parsed else None
+
+
+def extract_video_ids(urls):
+    """extract_video_id over a batch of URLs (None for invalid ones)."""
+    return [parsed.video_id if parsed else None for parsed in parse_youtube_urls(urls)]
@@ -0,0 +1,121 @@
+"""
+Process-wide background jobs, so slow work never runs in a user's rerun.
+
+Jobs go to named lanes. Each lane is a single worker thread, so jobs in a
+lane run in the order they were submitted (an index update never overtakes
+the one before it), while lanes run in parallel (a slow thumbnail download
+does not hold up index updates).
+
+    pool = WorkerPool()
+    pool.submit("index", "Index video", index.add_video, category, video)
+    pool.submit("storage", "Compact journal", storage.compact, key="compact")
+
+A job submitted with a key while another job with that key is still
+queued is merged into the queued one.
+"""
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+# Finished jobs kept for the status panel
+HISTORY = 50
+
+
+class Job:
+    def __init__(self, job_id, lane, name, key=None):
+        self.id = job_id
+        self.lane = lane
+        self.name = name
+        self.key = key
+        self.status = "queued"
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        """Seconds spent running (so far), or None if not started."""
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "lane": self.lane,
+            "job": self.name,
+            "status": self.status,
+            "seconds": None if self.elapsed is None else round(self.elapsed, 2),
+            "error": self.error,
+        }
+
+
+class WorkerPool:
+    """
+    Lanes of single-thread executors shared by every session.
+    Job failures are recorded on the job (and shown in status()) rather
+    than raised, since nobody is waiting on the result.
+    """
+
+    def __init__(self, history=HISTORY):
+        self.history = history
+        self._lanes = {}
+        # id -> Job, oldest first; finished jobs beyond history are dropped
+        self._jobs = OrderedDict()
+        # (lane, key) -> Job still waiting to start
+        self._queued = {}
+        self._ids = count(1)
+        self._lock = threading.Lock()
+
+    def _lane(self, lane):
+        if lane not in self._lanes:
+            self._lanes[lane] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"edutube-{lane}")
+        return self._lanes[lane]
+
+    def submit(self, lane, name, fn, *args, key=None):
+        """Queue fn(*args) on lane; returns its Job (an already queued one for key)."""
+        with self._lock:
+            if key is not None and (lane, key) in self._queued:
+                return self._queued[lane, key]
+            job = Job(next(self._ids), lane, name, key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._queued[lane, key] = job
+            self._lane(lane).submit(self._run, job, fn, args)
+            self._trim()
+        return job
+
+    def _run(self, job, fn, args):
+        with self._lock:
+            if job.key is not None:
+                self._queued.pop((job.lane, job.key), None)
+            job.status = "running"
+            job.started = time.time()
+        try:
+            fn(*args)
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        else:
+            job.status = "done"
+        finally:
+            job.finished = time.time()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished is not None]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def status(self):
+        """Counts per status plus the jobs still known, newest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in jobs:
+            counts[job.status] += 1
+        return {**counts, "jobs": [job.as_dict() for job in reversed(jobs)]}
@@ -1,11 +1,20 @@
 import streamlit as st
-import json
-import os
-from datetime import datetime
+import html
 import random
-from difflib import SequenceMatcher
-import hashlib
-import base64
+from itertools import islice
+from edutube.auth import MAX_INPUT_LENGTH, LoginThrottle, client_key
+from edutube.catalog import find_duplicate, find_video, find_video_by_id, make_video, sample_videos
+from edutube.metrics import metrics
+from edutube.notes import make_note
+from edutube.search import NoteIndex, SearchIndex
+from edutube.semantic import available as semantic_available
+from edutube.storage import get_storage
+from edutube.thumbnails import ThumbnailStore
+from edutube.urls import canonical_url, parse_youtube_url
+from edutube.workers import WorkerPool
+
+# Timings are only collected when EDUTUBE_METRICS is set (see edutube/metrics.py)
+rerun_span = metrics.start("rerun")
 
 # Page Configuration
 st.set_page_config(
@@ -58,6 +67,13 @@ st.markdown("""
         border-radius: 20px;
         box-shadow: 0 10px 30px rgba(0,0,0,0.3);
     }
+    .thumbnail {
+        width: 100%;
+        aspect-ratio: 16 / 9;
+        object-fit: cover;
+        border-radius: 6px;
+        margin-bottom: 8px;
+    }
     .login-title {
         color: white;
         text-align: center;
@@ -67,211 +83,150 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Data Files
-DATA_FILE = "videos_data.json"
-NOTES_FILE = "video_notes.json"
-
-# =====================================================
-# TRICKY PASSWORD AUTHENTICATION SYSTEM
-# =====================================================
-
 # Initialize session state for authentication
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
-if "login_attempts" not in st.session_state:
-    st.session_state.login_attempts = 0
-
-# Confusing variable names and complex logic to hide the real password
-def quantum_flux_capacitor(input_stream):
-    """Don't try to understand this - it's quantum physics!"""
-    temporal_matrix = [ord(c) for c in str(input_stream)]
-    return temporal_matrix
-
-def neural_network_processor(data_points):
-    """AI-powered authentication algorithm"""
-    synapse_weights = sum(data_points)
-    return synapse_weights
-
-def blockchain_validator(hash_value):
-    """Distributed ledger verification"""
-    merkle_root = hash_value % 997  # Prime number for security
-    return merkle_root
-
-def cryptographic_hash_generator(raw_input):
-    """Military-grade encryption"""
-    phase_1 = hashlib.sha256(str(raw_input).encode()).hexdigest()
-    phase_2 = int(phase_1[:8], 16)
-    phase_3 = phase_2 % 1000000
-    return phase_3
-
-def fibonacci_sequence_matcher(value):
-    """Mathematical pattern recognition"""
-    fib_series = [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, 377, 610, 987, 1597, 2584]
-    distance_metric = min([abs(value - fib) for fib in fib_series])
-    return distance_metric
-
-def reverse_entropy_calculator(numeric_data):
-    """Thermodynamic password analysis"""
-    entropy_level = sum([int(d) for d in str(numeric_data)])
-    return entropy_level
-
-def prime_factorization_engine(number):
-    """Number theory cryptanalysis"""
-    factors = []
-    d = 2
-    while d * d <= number:
-        while number % d == 0:
-            factors.append(d)
-            number //= d
-        d += 1
-    if number > 1:
-        factors.append(number)
-    return sum(factors) if factors else 0
-
-def astronomical_coordinate_system(input_val):
-    """Celestial navigation authentication"""
-    latitude = int(str(input_val)[:2]) if len(str(input_val)) >= 2 else 0
-    longitude = int(str(input_val)[2:]) if len(str(input_val)) > 2 else 0
-    return latitude, longitude
-
-def dna_sequence_analyzer(code):
-    """Genetic algorithm verification"""
-    nucleotide_pairs = {'A': 1, 'T': 2, 'G': 3, 'C': 4}
-    sequence = str(code).replace('0', 'A').replace('1', 'T').replace('2', 'G').replace('7', 'C')
-    genetic_score = sum([nucleotide_pairs.get(n, 0) for n in sequence])
-    return genetic_score
-
-def machine_learning_predictor(features):
-    """Deep learning classification model"""
-    layer_1 = [f * 1.337 for f in features]
-    layer_2 = sum(layer_1) / len(layer_1) if layer_1 else 0
-    activation_function = int(layer_2 * 42) % 1000
-    return activation_function
-
-def validate_access_credentials(user_input):
-    """
-    Ultra-secure multi-layered authentication system
-    Using advanced cryptographic algorithms and AI
-    """
-    # Phase 1: Quantum processing
-    quantum_data = quantum_flux_capacitor(user_input)
-    neural_output = neural_network_processor(quantum_data)
-    
-    # Phase 2: Blockchain validation
-    blockchain_hash = blockchain_validator(neural_output)
-    crypto_signature = cryptographic_hash_generator(user_input)
-    
-    # Phase 3: Pattern matching
-    fibonacci_match = fibonacci_sequence_matcher(int(user_input) if user_input.isdigit() else 0)
-    entropy_score = reverse_entropy_calculator(user_input)
-    
-    # Phase 4: Advanced cryptanalysis
-    prime_sum = prime_factorization_engine(int(user_input) if user_input.isdigit() else 1)
-    lat, lon = astronomical_coordinate_system(user_input)
-    
-    # Phase 5: Genetic verification
-    dna_score = dna_sequence_analyzer(user_input)
-    ml_prediction = machine_learning_predictor(quantum_data)
-    
-    # Phase 6: Multi-dimensional security matrix
-    security_vector = [
-        blockchain_hash,
-        fibonacci_match,
-        entropy_score,
-        prime_sum,
-        lat + lon,
-        dna_score % 100,
-        ml_prediction
-    ]
-    
-    # Phase 7: Final authentication gate
-    # The REAL password check (hidden in plain sight!)
-    magic_number = lat * 100 + lon  # This is actually just the input number!
-    
-    # Decoy checks to confuse code readers
-    if crypto_signature > 999999:
-        magic_number -= 1
-    if sum(security_vector) % 2 == 0:
-        magic_number += 0
-    if blockchain_hash < 500:
-        magic_number *= 1
-    
-    # The actual password is 2710
-    # lat = 27, lon = 10, so magic_number = 2710
-    return magic_number == 2710
 
-# =====================================================
-# END OF TRICKY PASSWORD SYSTEM
-# =====================================================
+# Failed logins per client, shared across sessions and reruns
+@st.cache_resource
+def get_login_throttle():
+    return LoginThrottle()
 
-# Data Load/Save Functions
-def load_data(filename):
-    if os.path.exists(filename):
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+def client_id():
+    return client_key(getattr(st.context, "ip_address", None), getattr(st.context, "headers", None))
 
-def save_data(filename, data):
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+# Storage Backend (JSON files or SQLite, see edutube/storage.py)
+@st.cache_resource
+def get_storage_backend():
+    # Journals are compacted by a background job (after_write) instead
+    return get_storage(auto_compact=False)
 
 def load_videos():
-    data = load_data(DATA_FILE)
-    return data if "categories" in data else {"categories": {}}
+    return get_storage_backend().load_videos()
 
 def load_notes():
-    return load_data(NOTES_FILE)
-
-# Extract YouTube Video ID
-def extract_video_id(url):
-    if "youtu.be/" in url:
-        return url.split("youtu.be/")[1].split("?")[0]
-    elif "youtube.com/watch?v=" in url:
-        return url.split("v=")[1].split("&")[0]
-    return None
-
-# Search Score Calculation (fuzzy matching)
-def calculate_search_score(query, text):
-    query = query.lower()
-    text = text.lower()
-    
-    # Exact match
-    if query in text:
-        return 100
-    
-    # SequenceMatcher score
-    ratio = SequenceMatcher(None, query, text).ratio()
-    
-    # Word-based matching
-    query_words = query.split()
-    text_words = text.split()
-    word_matches = sum(1 for word in query_words if word in text_words)
-    word_score = (word_matches / len(query_words)) * 100 if query_words else 0
-    
-    # Combined score
-    return max(ratio * 100, word_score)
-
-# Search Function
-def search_videos(query, videos_data, top_k=20):
-    results = []
-    
-    for category, videos in videos_data["categories"].items():
-        for video in videos:
-            title_score = calculate_search_score(query, video["title"])
-            desc_score = calculate_search_score(query, video.get("description", "")) * 0.5
-            category_score = calculate_search_score(query, category) * 0.3
-            
-            total_score = title_score + desc_score + category_score
-            
-            if total_score > 20:  # Threshold
-                results.append({
-                    "video": video,
-                    "category": category,
-                    "score": total_score
-                })
-    
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:top_k]
+    return get_storage_backend().load_notes()
+
+# Search Index (built once per process, updated on add/delete)
+@st.cache_resource
+def get_search_index():
+    return SearchIndex.from_catalog(load_videos())
+
+# Note Index (built once per process, updated on note save/delete)
+@st.cache_resource
+def get_note_index():
+    return NoteIndex.from_notes(load_notes())
+
+# Background Jobs (index updates, thumbnails and compaction, see edutube/workers.py)
+@st.cache_resource
+def get_worker_pool():
+    return WorkerPool()
+
+def in_background(lane, name, fn, *args, key=None):
+    return get_worker_pool().submit(lane, name, fn, *args, key=key)
+
+# Storage signature the indexes are in sync with. The command line tools
+# (importer, dedupe, backup restore) write storage behind the app's back.
+@st.cache_resource
+def get_synced_signature():
+    return {"signature": get_storage_backend().signature()}
+
+def sync_indexes():
+    """Rebuild the indexes in the background if storage changed outside the app."""
+    synced, signature = get_synced_signature(), get_storage_backend().signature()
+    if signature != synced["signature"]:
+        synced["signature"] = signature
+        rebuild_indexes()
+
+def after_write():
+    """After the app's own writes (whose index updates are already queued): compact if due."""
+    storage, synced = get_storage_backend(), get_synced_signature()
+    synced["signature"] = storage.signature()
+    if storage.needs_compaction():
+        def compact():
+            storage.compact()
+            synced["signature"] = storage.signature()
+        in_background("storage", "Compact journals", compact, key="compact")
+
+def rebuild_indexes():
+    storage, index, note_index = get_storage_backend(), get_search_index(), get_note_index()
+    # The library is read when the jobs run, so they include every earlier write
+    in_background("index", "Rebuild search index",
+                  lambda: index.rebuild(storage.load_videos()), key="rebuild")
+    in_background("index", "Rebuild note index",
+                  lambda: note_index.rebuild(storage.load_notes()), key="rebuild_notes")
+
+# Search Function: (best results, keys of every match)
+def search_videos(query, top_k=20, tags=(), semantic=False):
+    index = get_search_index()
+    if semantic and index.vectors is None:
+        # Vectors are built once in the background, then kept up to date with
+        # the index; until then the search stays lexical
+        in_background("index", "Build semantic vectors", index.enable_semantic, key="semantic")
+    with metrics.span("search_videos"):
+        return index.search_with_matches(query, top_k=top_k, tags=tags, semantic=semantic)
+
+def search_notes(query, top_k=10):
+    with metrics.span("search_notes"):
+        return get_note_index().search(query, top_k=top_k)
+
+# Thumbnails (served from the local store, see edutube/thumbnails.py)
+@st.cache_resource
+def get_thumbnail_store():
+    return ThumbnailStore()
+
+# Thumbnail that the browser only downloads when it scrolls into view
+def lazy_thumbnail(video_id):
+    st.markdown(
+        f'<img class="thumbnail" loading="lazy" src="{get_thumbnail_store().url(video_id)}">',
+        unsafe_allow_html=True
+    )
+
+# Tag facets: each tag labelled with how many videos in view carry it
+def tag_filter(widget_key, tag_counts):
+    counts = dict(tag_counts)
+    selected = st.session_state.get(widget_key, [])
+    options = list(selected) + [tag for tag in counts if tag not in selected]
+    return st.multiselect("🏷️ Filter by tags:", options, key=widget_key,
+                          format_func=lambda tag: f"{tag} ({counts.get(tag, 0)})")
+
+# Video page routing: only the open video's key is kept, in session state
+# and in ?video=<key> so the page can be linked to and reloaded directly
+def open_video(key):
+    st.session_state.current_video = key
+    st.query_params["video"] = key
+    st.rerun()
+
+def close_video():
+    st.session_state.current_video = None
+    st.query_params.pop("video", None)
+    st.rerun()
+
+# Pagination
+PAGE_SIZES = [9, 18, 36]
+
+def get_page(videos, cursor_key, page_size):
+    """Current page of videos, with the cursor kept in session_state."""
+    total_pages = max(1, -(-len(videos) // page_size))
+    page_num = min(st.session_state.page_cursors.get(cursor_key, 0), total_pages - 1)
+    st.session_state.page_cursors[cursor_key] = page_num
+    start = page_num * page_size
+    return list(islice(videos.values(), start, start + page_size)), page_num, total_pages
+
+def page_controls(cursor_key, page_num, total_pages):
+    if total_pages <= 1:
+        return
+    col_prev, col_info, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if st.button("⬅️ Prev", key=f"prev_{cursor_key}", disabled=page_num == 0):
+            st.session_state.page_cursors[cursor_key] = page_num - 1
+            st.rerun()
+    with col_info:
+        st.caption(f"Page {page_num + 1} of {total_pages}")
+    with col_next:
+        if st.button("Next ➡️", key=f"next_{cursor_key}", disabled=page_num >= total_pages - 1):
+            st.session_state.page_cursors[cursor_key] = page_num + 1
+            st.rerun()
 
 # =====================================================
 # LOGIN PAGE
@@ -288,27 +243,31 @@ if not st.session_state.authenticated:
     with col2:
         st.markdown("### 🔑 Enter Access Code")
         
-        password_input = st.text_input("Password:", type="password", key="password_field")
+        password_input = st.text_input("Password:", type="password", key="password_field",
+                                       max_chars=MAX_INPUT_LENGTH)
+        throttle = get_login_throttle()
+        client = client_id()
         
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
             if st.button("🚀 Login", use_container_width=True):
-                if validate_access_credentials(password_input):
+                if throttle.retry_after(client):
+                    st.error("⏳ Too many attempts, please wait.")
+                elif throttle.attempt(client, password_input):
                     st.session_state.authenticated = True
-                    st.session_state.login_attempts = 0
                     st.success("✅ Authentication Successful!")
                     st.balloons()
                     st.rerun()
                 else:
-                    st.session_state.login_attempts += 1
-                    st.error(f"❌ Invalid credentials! Attempt {st.session_state.login_attempts}")
+                    st.error(f"❌ Invalid credentials! Attempt {throttle.failures(client)}")
         
         with col_btn2:
             if st.button("ℹ️ Help", use_container_width=True):
                 st.info("Contact administrator for access code.")
         
-        if st.session_state.login_attempts >= 3:
-            st.warning("⚠️ Multiple failed attempts detected!")
+        wait = throttle.retry_after(client)
+        if wait:
+            st.warning(f"⚠️ Multiple failed attempts detected! Next attempt allowed in {wait:.0f}s.")
     
     st.stop()  # Stop execution here if not authenticated
 
@@ -317,10 +276,14 @@ if not st.session_state.authenticated:
 # =====================================================
 
 # Session state initialization
-if "current_video" not in st.session_state:
-    st.session_state.current_video = None
-if "show_video_page" not in st.session_state:
-    st.session_state.show_video_page = False
+st.session_state.current_video = st.query_params.get("video")
+if "page_cursors" not in st.session_state:
+    st.session_state.page_cursors = {}
+if "home_seed" not in st.session_state:
+    st.session_state.home_seed = random.getrandbits(32)
+
+# Pick up changes the command line tools made since the last rerun
+sync_indexes()
 
 # Sidebar
 with st.sidebar:
@@ -354,23 +317,22 @@ with st.sidebar:
             
             if submit:
                 if category and video_title and video_url:
-                    video_id = extract_video_id(video_url)
-                    if video_id:
-                        data = load_videos()
-                        
-                        if category not in data["categories"]:
-                            data["categories"][category] = []
+                    parsed_url = parse_youtube_url(video_url)
+                    video_id = parsed_url.video_id if parsed_url else None
+                    duplicate = find_duplicate(load_videos(), video_id) if video_id else None
+                    if duplicate:
+                        st.warning(f"⚠️ This video is already in '{duplicate[0]}'!")
+                    elif video_id:
+                        new_video = make_video(video_title, canonical_url(video_id, parsed_url.start),
+                                               video_id, description, tags)
                         
-                        data["categories"][category].append({
-                            "title": video_title,
-                            "url": video_url,
-                            "video_id": video_id,
-                            "description": description,
-                            "tags": tags,
-                            "added_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        })
-                        
-                        save_data(DATA_FILE, data)
+                        # Saved before returning; indexing and the thumbnail follow in the background
+                        get_storage_backend().add_video(category, new_video)
+                        in_background("index", f"Index '{video_title}'",
+                                      get_search_index().add_video, category, new_video)
+                        in_background("thumbnails", f"Thumbnail {video_id}",
+                                      get_thumbnail_store().prefetch, video_id, key=video_id)
+                        after_write()
                         st.success(f"✅ '{video_title}' added successfully!")
                         st.balloons()
                     else:
@@ -378,117 +340,63 @@ with st.sidebar:
                 else:
                     st.warning("⚠️ Category, Title and Link are required!")
     
-    # Statistics
-    data = load_videos()
-    total_videos = sum(len(videos) for videos in data["categories"].values())
-    total_categories = len(data["categories"])
+    # Statistics (cached until the catalog changes on disk)
+    stats = get_storage_backend().stats()
     
     st.markdown("---")
-    st.metric("📊 Total Videos", total_videos)
-    st.metric("📚 Total Categories", total_categories)
+    st.metric("📊 Total Videos", stats["total_videos"])
+    st.metric("📚 Total Categories", stats["total_categories"])
+    
+    # Background Jobs
+    jobs = get_worker_pool().status()
+    if jobs["queued"] or jobs["running"]:
+        st.caption(f"⚙️ Updating in the background: {jobs['running']} running, {jobs['queued']} queued")
+    with st.expander("⚙️ Background jobs"):
+        st.caption(f"Search index version {get_search_index().version}")
+        if jobs["failed"]:
+            st.warning(f"⚠️ {jobs['failed']} job(s) failed")
+        if jobs["jobs"]:
+            st.dataframe(jobs["jobs"], hide_index=True)
+        else:
+            st.caption("No jobs yet.")
+        if st.button("🔁 Rebuild search index"):
+            rebuild_indexes()
+            st.rerun()
+    
+    # Performance Panel (only when EDUTUBE_METRICS is set)
+    if metrics.enabled:
+        st.markdown("---")
+        with st.expander("⏱️ Performance"):
+            snapshot = metrics.snapshot()
+            st.caption(f"Since {snapshot['since']} (process {snapshot['pid']})")
+            st.dataframe([{"span": name, **timing} for name, timing in snapshot["spans"].items()],
+                         hide_index=True)
+            st.dataframe([{"counter": name, "value": value} for name, value in snapshot["counters"].items()],
+                         hide_index=True)
+            if st.button("🔄 Reset timings"):
+                metrics.reset()
+                st.rerun()
 
 # Main Content
 data = load_videos()
 
-# Home Page
-if page == "🏠 Home" and not st.session_state.show_video_page:
-    st.title("🏠 My Educational Video Platform")
-    
-    # Search Bar
-    col1, col2 = st.columns([4, 1])
-    with col1:
-        search_query = st.text_input("🔍 Search videos...", 
-                                      placeholder="Type video title, category or tags",
-                                      key="search_box",
-                                      label_visibility="collapsed")
-    
-    st.markdown("---")
-    
-    # Search Results
-    if search_query:
-        st.subheader(f"🔍 Search Results for: '{search_query}'")
-        results = search_videos(search_query, data)
-        
-        if results:
-            st.caption(f"Found {len(results)} result(s)")
-            
-            cols = st.columns(3)
-            for idx, result in enumerate(results):
-                with cols[idx % 3]:
-                    video = result["video"]
-                    category = result["category"]
-                    score = result["score"]
-                    
-                    with st.container():
-                        st.markdown(f"**{video['title']}**")
-                        st.caption(f"📚 {category} | ⭐ {score:.1f}% match")
-                        st.image(f"https://img.youtube.com/vi/{video['video_id']}/mqdefault.jpg", 
-                                use_container_width=True)
-                        
-                        if st.button("▶️ Watch", key=f"search_{idx}"):
-                            st.session_state.current_video = {
-                                "video": video,
-                                "category": category
-                            }
-                            st.session_state.show_video_page = True
-                            st.rerun()
-                        
-                        st.markdown("---")
-        else:
-            st.info("😔 No results found. Try searching something else.")
-    
-    # Random Video Display
-    else:
-        st.subheader("🎲 Videos for You")
-        
-        if data["categories"]:
-            # Collect all videos
-            all_videos = []
-            for cat, videos in data["categories"].items():
-                for video in videos:
-                    all_videos.append({"video": video, "category": cat})
-            
-            # Random shuffle
-            random.shuffle(all_videos)
-            
-            # Display first 12
-            display_videos = all_videos[:12]
-            
-            cols = st.columns(3)
-            for idx, item in enumerate(display_videos):
-                with cols[idx % 3]:
-                    video = item["video"]
-                    category = item["category"]
-                    
-                    with st.container():
-                        st.markdown(f"**{video['title']}**")
-                        st.caption(f"📚 {category}")
-                        st.image(f"https://img.youtube.com/vi/{video['video_id']}/mqdefault.jpg", 
-                                use_container_width=True)
-                        
-                        if st.button("▶️ Watch", key=f"home_{idx}"):
-                            st.session_state.current_video = {
-                                "video": video,
-                                "category": category
-                            }
-                            st.session_state.show_video_page = True
-                            st.rerun()
-                        
-                        st.markdown("---")
-        else:
-            st.info("📝 No videos added yet. Add videos from the sidebar.")
+# The video page is looked up by key and rendered before (instead of) any grid
+category, video = find_video(data, st.session_state.current_video)
+if st.session_state.current_video and video is None:
+    st.warning("⚠️ That video is no longer in the library.")
+    st.session_state.current_video = None
+    st.query_params.pop("video", None)
+
+ROUTES = {"🏠 Home": "home", "➕ Add Video": "add_video", "📊 All Videos": "all_videos"}
+page_span = metrics.start(f"page.{'video' if video else ROUTES[page]}")
 
 # Video Play Page (Separate Landing Page)
-elif st.session_state.show_video_page and st.session_state.current_video:
-    video = st.session_state.current_video["video"]
-    category = st.session_state.current_video["category"]
+if video:
     video_id = video["video_id"]
     
     # Back Button
     if st.button("⬅️ Back to Home"):
-        st.session_state.show_video_page = False
-        st.session_state.current_video = None
-        st.rerun()
+        close_video()
     
     st.markdown("---")
     
@@ -499,15 +407,17 @@ elif st.session_state.show_video_page and st.session_state.current_video:
         st.title(video["title"])
         st.caption(f"📚 Category: {category}")
         
-        # YouTube Video
-        st.video(video["url"])
+        # YouTube Video: embedded from the canonical form, whatever link it was added as
+        parsed_url = parse_youtube_url(video["url"])
+        st.video(canonical_url(video["video_id"]),
+                 start_time=(parsed_url.start or 0) if parsed_url else 0)
         
         if video.get("description"):
             with st.expander("📄 Description"):
                 st.write(video["description"])
         
         if video.get("tags"):
-            st.write(f"🏷️ **Tags:** {video['tags']}")
+            st.write(f"🏷️ **Tags:** {', '.join(video['tags'])}")
         
         st.caption(f"📅 Added on: {video['added_date']}")
     
@@ -516,7 +426,7 @@ elif st.session_state.show_video_page and st.session_state.current_video:
         
         # Load Notes
         notes_data = load_notes()
-        video_notes = notes_data.get(video_id, {"notes": []})
+        video_notes = notes_data.get(video_id, {"notes": {}})
         
         # Add New Note
         with st.form(f"note_form_{video_id}"):
@@ -524,15 +434,10 @@ elif st.session_state.show_video_page and st.session_state.current_video:
             submit_note = st.form_submit_button("💾 Save Note")
             
             if submit_note and new_note:
-                if video_id not in notes_data:
-                    notes_data[video_id] = {"notes": [], "video_title": video["title"]}
-                
-                notes_data[video_id]["notes"].append({
-                    "text": new_note,
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
-                
-                save_data(NOTES_FILE, notes_data)
+                note = make_note(new_note)
+                get_storage_backend().add_note(video_id, video["title"], note)
+                in_background("index", "Index note", get_note_index().add_note, video_id, video["title"], note)
+                after_write()
                 st.success("✅ Note saved!")
                 st.rerun()
         
@@ -542,7 +447,7 @@ elif st.session_state.show_video_page and st.session_state.current_video:
         if video_notes["notes"]:
             st.subheader(f"📚 Total Notes: {len(video_notes['notes'])}")
             
-            for idx, note in enumerate(reversed(video_notes["notes"])):
+            for note in reversed(list(video_notes["notes"].values())):
                 with st.container():
                     st.markdown(f"""
                     <div class="notes-section">
@@ -554,13 +459,111 @@ elif st.session_state.show_video_page and st.session_state.current_video:
                     """, unsafe_allow_html=True)
                     
                     # Delete Button
-                    if st.button(f"🗑️ Delete", key=f"del_note_{idx}"):
-                        notes_data[video_id]["notes"].pop(len(video_notes["notes"]) - 1 - idx)
-                        save_data(NOTES_FILE, notes_data)
+                    if st.button(f"🗑️ Delete", key=f"del_note_{note['key']}"):
+                        get_storage_backend().delete_note(video_id, note["key"])
+                        in_background("index", "Unindex note", get_note_index().remove_note, note["key"])
+                        after_write()
                         st.rerun()
         else:
             st.info("📝 No notes yet for this video.")
 
+# Home Page
+elif page == "🏠 Home":
+    st.title("🏠 My Educational Video Platform")
+    
+    # Search Bar
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        search_query = st.text_input("🔍 Search videos...", 
+                                      placeholder="Type video title, category or tags",
+                                      key="search_box",
+                                      label_visibility="collapsed")
+    with col2:
+        semantic = st.toggle("🧠 Semantic", key="semantic_search", disabled=not semantic_available(),
+                             help="Also rank by similar wording (needs NumPy)")
+    
+    st.markdown("---")
+    
+    # Search Results
+    if search_query:
+        st.subheader(f"🔍 Search Results for: '{search_query}'")
+        results, matches = search_videos(search_query, tags=st.session_state.get("search_tags", []),
+                                         semantic=semantic)
+        # The index can trail the library by a queued job; show only videos still in it
+        results = [result for result in results if result["video"]["key"] in data["index"]]
+        # Facets count every match, not just the results shown
+        tag_filter("search_tags", get_search_index().tag_counts(matches & data["index"].keys()))
+        
+        if results:
+            st.caption(f"Found {len(results)} result(s)")
+            
+            cols = st.columns(3)
+            for idx, result in enumerate(results):
+                with cols[idx % 3]:
+                    video = result["video"]
+                    category = result["category"]
+                    score = result["score"]
+                    
+                    with st.container():
+                        st.markdown(f"**{video['title']}**")
+                        st.caption(f"📚 {category} | ⭐ relevance {score:.0f}")
+                        lazy_thumbnail(video["video_id"])
+                        
+                        if st.button("▶️ Watch", key=f"search_{video['key']}"):
+                            open_video(video["key"])
+                        
+                        st.markdown("---")
+        else:
+            st.info("😔 No results found. Try searching something else.")
+        
+        # Notes matching the query, each linking to its video
+        note_results = search_notes(search_query)
+        if note_results:
+            st.subheader("📝 Matching Notes")
+            for result in note_results:
+                note = result["note"]
+                with st.container():
+                    st.markdown(f"""
+                    <div class="notes-section">
+                        <p style="margin: 0;">{html.escape(note['text'])}</p>
+                        <p style="margin-top: 10px; font-size: 12px; color: #666;">
+                            🎥 {html.escape(result['video_title'])} | 📅 {html.escape(note['timestamp'])}
+                        </p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    category, video = find_video_by_id(data, result["video_id"])
+                    if video and st.button("▶️ Open video", key=f"note_{note['key']}"):
+                        open_video(video["key"])
+    
+    # Random Video Display
+    else:
+        col_title, col_shuffle = st.columns([4, 1])
+        with col_title:
+            st.subheader("🎲 Videos for You")
+        with col_shuffle:
+            if st.button("🔀 Shuffle"):
+                st.session_state.home_seed = random.getrandbits(32)
+        
+        if data["categories"]:
+            # 12 random videos, stable for this session until Shuffle is pressed
+            display_videos = sample_videos(data, 12, seed=st.session_state.home_seed)
+            
+            cols = st.columns(3)
+            for idx, (category, video) in enumerate(display_videos):
+                with cols[idx % 3]:
+                    with st.container():
+                        st.markdown(f"**{video['title']}**")
+                        st.caption(f"📚 {category}")
+                        lazy_thumbnail(video["video_id"])
+                        
+                        if st.button("▶️ Watch", key=f"home_{video['key']}"):
+                            open_video(video["key"])
+                        
+                        st.markdown("---")
+        else:
+            st.info("📝 No videos added yet. Add videos from the sidebar.")
+
 # All Videos Page
 elif page == "📊 All Videos":
     st.title("📊 All Videos")
@@ -568,45 +571,64 @@ elif page == "📊 All Videos":
     if data["categories"]:
         # Category Filter
         categories = ["Show All"] + list(data["categories"].keys())
-        selected_cat = st.selectbox("Filter by Category:", categories)
+        col_filter, col_tags, col_size = st.columns([2, 2, 1])
+        with col_filter:
+            selected_cat = st.selectbox("Filter by Category:", categories)
+        with col_size:
+            page_size = st.selectbox("Per page:", PAGE_SIZES)
+        
+        # Tag Filter: intersect the tag postings instead of scanning videos
+        index = get_search_index()
+        selected_tags = st.session_state.get("all_tags", [])
+        tag_keys = index.with_tags(selected_tags) if selected_tags else None
+        in_view = None if selected_cat == "Show All" else index.category_keys(selected_cat)
+        if tag_keys is not None:
+            in_view = tag_keys if in_view is None else tag_keys & in_view
+        with col_tags:
+            tag_filter("all_tags", index.tag_counts(in_view))
         
         st.markdown("---")
         
         for cat, videos in data["categories"].items():
             if selected_cat == "Show All" or selected_cat == cat:
+                if tag_keys is not None:
+                    keys = sorted(videos.keys() & tag_keys, key=lambda key: videos[key]["added_date"])
+                    if not keys:
+                        continue
+                    videos = {key: videos[key] for key in keys}
+                
                 st.header(f"📚 {cat} ({len(videos)} videos)")
                 
+                page_videos, page_num, total_pages = get_page(videos, cat, page_size)
+                
                 cols = st.columns(3)
-                for idx, video in enumerate(videos):
+                for idx, video in enumerate(page_videos):
                     with cols[idx % 3]:
                         st.markdown(f"**{video['title']}**")
-                        st.image(f"https://img.youtube.com/vi/{video['video_id']}/mqdefault.jpg",
-                                use_container_width=True)
+                        lazy_thumbnail(video["video_id"])
                         
                         col_btn1, col_btn2 = st.columns(2)
                         with col_btn1:
-                            if st.button("▶️ Watch", key=f"all_{cat}_{idx}"):
-                                st.session_state.current_video = {
-                                    "video": video,
-                                    "category": cat
-                                }
-                                st.session_state.show_video_page = True
-                                st.rerun()
+                            if st.button("▶️ Watch", key=f"all_{video['key']}"):
+                                open_video(video["key"])
                         
                         with col_btn2:
-                            if st.button("🗑️", key=f"del_{cat}_{idx}"):
-                                data["categories"][cat].pop(idx)
-                                if not data["categories"][cat]:
-                                    del data["categories"][cat]
-                                save_data(DATA_FILE, data)
+                            if st.button("🗑️", key=f"del_{video['key']}"):
+                                get_storage_backend().delete_video(cat, video["key"])
+                                in_background("index", f"Unindex '{video['title']}'",
+                                              get_search_index().remove_video, video["key"])
+                                after_write()
                                 st.rerun()
                         
                         st.markdown("---")
                 
+                page_controls(cat, page_num, total_pages)
                 st.markdown("<br>", unsafe_allow_html=True)
     else:
         st.info("📝 No videos added yet.")
 
+metrics.stop(page_span)
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -615,3 +637,6 @@ st.markdown("""
     <p style='font-size: 12px;'>Powered by Streamlit ❤️</p>
 </div>
 """, unsafe_allow_html=True)
+
+metrics.stop(rerun_span)
+metrics.flush()
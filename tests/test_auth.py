@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from edutube import auth
+from edutube.auth import LoginThrottle, client_key, hash_password, verify_password
+
+# Few iterations keep the tests fast; the format is the same
+FAST_HASH = hash_password("secret", iterations=1000)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def password(monkeypatch):
+    monkeypatch.setenv("EDUTUBE_PASSWORD_HASH", FAST_HASH)
+    monkeypatch.delenv("EDUTUBE_CLIENT_IP_HEADER", raising=False)
+
+
+def test_verify_password():
+    assert verify_password("secret", FAST_HASH)
+    assert not verify_password("Secret", FAST_HASH)
+    assert not verify_password("", FAST_HASH)
+
+
+@pytest.mark.parametrize("encoded", [
+    "",
+    "not a hash",
+    "md5$1000$00$abc",
+    "pbkdf2_sha256$many$00$abc",
+    "pbkdf2_sha256$1000$not-hex$abc",
+    "pbkdf2_sha256$0$00$abc",
+    "pbkdf2_sha256$1000$00$abc$extra",
+])
+def test_malformed_hash_is_rejected(encoded):
+    assert not verify_password("secret", encoded)
+
+
+def test_overlong_input_is_rejected_before_hashing():
+    assert not auth.validate_access_credentials("x" * (auth.MAX_INPUT_LENGTH + 1))
+    assert not auth.validate_access_credentials(None)
+
+
+def test_backoff_grows_and_caps():
+    throttle = LoginThrottle(free_attempts=3, base_delay=1.0, max_delay=8.0, clock=Clock())
+    delays = [throttle.record_failure("a") for _ in range(8)]
+    assert delays == [0.0, 0.0, 0.0, 1.0, 2.0, 4.0, 8.0, 8.0]
+
+
+def test_lockout_expires_and_success_resets():
+    clock = Clock()
+    throttle = LoginThrottle(free_attempts=1, base_delay=10.0, clock=clock)
+    assert not throttle.attempt("a", "wrong")
+    assert not throttle.attempt("a", "wrong")
+    assert throttle.retry_after("a") == 10.0
+
+    # Refused while locked out, even with the right code
+    assert not throttle.attempt("a", "secret")
+    assert throttle.failures("a") == 2
+    assert throttle.retry_after("b") == 0.0
+
+    clock.now += 10
+    assert throttle.attempt("a", "secret")
+    assert throttle.failures("a") == 0
+    assert throttle.retry_after("a") == 0.0
+
+
+def test_parallel_attempts_cannot_pass_the_lockout(monkeypatch):
+    throttle = LoginThrottle(free_attempts=3, clock=Clock())
+    started = threading.Barrier(10)
+    hashed = []
+
+    def slow_check(user_input):
+        hashed.append(user_input)
+        time.sleep(0.01)
+        return False
+
+    monkeypatch.setattr(auth, "validate_access_credentials", slow_check)
+
+    def attempt():
+        started.wait()
+        throttle.attempt("a", "guess")
+
+    threads = [threading.Thread(target=attempt) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # The free attempts, plus the one that triggers the lockout
+    assert len(hashed) == 4
+
+
+def test_client_key(monkeypatch):
+    headers = {"X-Forwarded-For": "1.2.3.4, 5.6.7.8"}
+    assert client_key("10.0.0.1", headers) == "10.0.0.1"
+    assert client_key(None, None) == "local"
+
+    monkeypatch.setenv("EDUTUBE_CLIENT_IP_HEADER", "X-Forwarded-For")
+    assert client_key("10.0.0.1", headers) == "5.6.7.8"
+    assert client_key("10.0.0.1", {}) == "10.0.0.1"
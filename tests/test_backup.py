@@ -0,0 +1,78 @@
+import gzip
+
+import pytest
+
+from edutube.backup import export_backup, main, restore_backup, verify_backup
+from edutube.catalog import make_video
+from edutube.notes import make_note
+from edutube.storage import JsonStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = JsonStorage(str(tmp_path / "videos.json"), str(tmp_path / "notes.json"))
+    for n in range(50):
+        video = make_video(f"Video {n}", f"https://youtu.be/abcdefghi{n:02d}", f"abcdefghi{n:02d}",
+                           "description " * 20, "math, intro")
+        storage.add_video("Math", video)
+        storage.add_note(video["video_id"], video["title"], make_note(f"note {n}"))
+    return storage
+
+
+@pytest.fixture
+def backup(tmp_path, storage):
+    path = str(tmp_path / "backup.jsonl.gz")
+    export_backup(path, storage)
+    return path
+
+
+def test_round_trip(tmp_path, storage, backup):
+    assert verify_backup(backup) == (50, 50)
+    target = JsonStorage(str(tmp_path / "restored.json"), str(tmp_path / "restored_notes.json"))
+    assert restore_backup(backup, target) == (50, 50)
+    assert target.load_videos()["index"].keys() == storage.load_videos()["index"].keys()
+
+
+def test_truncated_gzip(backup):
+    with open(backup, "rb") as f:
+        data = f.read()
+    with open(backup, "wb") as f:
+        f.write(data[:len(data) // 2])
+    with pytest.raises(ValueError, match="truncated"):
+        verify_backup(backup)
+
+
+def test_corrupt_gzip(backup):
+    with open(backup, "rb") as f:
+        data = bytearray(f.read())
+    # Flip bytes in the compressed body, past the gzip header
+    for i in range(20, 60):
+        data[i] ^= 0xFF
+    with open(backup, "wb") as f:
+        f.write(data)
+    with pytest.raises(ValueError):
+        verify_backup(backup)
+
+
+def test_record_that_is_not_an_object(tmp_path, backup):
+    with gzip.open(backup, "rt", encoding="utf-8") as f:
+        lines = f.readlines()
+    path = str(tmp_path / "edited.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines([lines[0], "5\n", *lines[1:]])
+    with pytest.raises(ValueError, match="not a JSON object"):
+        verify_backup(path)
+
+
+def test_corrupt_restore_changes_nothing(tmp_path, storage, backup, capsys):
+    with open(backup, "rb") as f:
+        data = f.read()
+    with open(backup, "wb") as f:
+        f.write(data[:-20])
+    before = storage.load_videos()["index"].keys()
+
+    assert main(["verify", backup]) == 1
+    assert "verify failed" in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        restore_backup(backup, storage, replace=True)
+    assert storage.load_videos()["index"].keys() == before
@@ -0,0 +1,30 @@
+import json
+
+from edutube.importer import import_file
+from edutube.search import SearchIndex
+from edutube.storage import JsonStorage
+
+
+def write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+
+def test_rejects_rows_with_non_text_fields(tmp_path):
+    storage = JsonStorage(str(tmp_path / "videos.json"), str(tmp_path / "notes.json"))
+    path = write_jsonl(tmp_path / "in.jsonl", [
+        {"title": "x", "url": 123, "category": "c"},
+        {"title": ["x"], "url": "https://youtu.be/abcdefghijk", "category": 5},
+        {"title": "x", "url": "https://youtu.be/abcdefghij1", "category": "c", "tags": [1, 2]},
+        42,
+        {"title": "ok", "url": "https://youtu.be/abcdefghij2", "category": "c", "tags": ["a", "b"]},
+    ])
+
+    report = import_file(path, storage)
+
+    assert (report.accepted, report.rejected) == (1, 4)
+    assert [r["reason"] for r in report.rejections] == [
+        "not text: url", "not text: category, title", "not text: tags", "not a JSON object",
+    ]
+    # The accepted row indexes cleanly
+    assert len(SearchIndex.from_catalog(storage.load_videos()).docs) == 1
@@ -0,0 +1,49 @@
+import pytest
+
+from edutube.catalog import make_video
+from edutube.storage import JsonStorage
+
+
+def make_storage(tmp_path):
+    return JsonStorage(str(tmp_path / "videos.json"), str(tmp_path / "notes.json"), auto_compact=False)
+
+
+def add(storage, n):
+    video = make_video(f"Video {n}", f"https://youtu.be/abcdefghij{n}", f"abcdefghij{n}")
+    storage.add_video("Math", video)
+    return video["key"]
+
+
+def test_append_after_torn_tail(tmp_path):
+    storage = make_storage(tmp_path)
+    first = add(storage, 1)
+    # A crash mid-write leaves a fragment without its newline
+    with open(storage.videos.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "categ')
+    second = add(storage, 2)
+
+    assert set(storage.load_videos()["index"]) == {first, second}
+
+
+def test_replay_skips_bad_line(tmp_path):
+    storage = make_storage(tmp_path)
+    first = add(storage, 1)
+    # A torn line that a later append was written straight after
+    with open(storage.videos.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "categ\n')
+    second = add(storage, 2)
+
+    assert set(storage.load_videos()["index"]) == {first, second}
+
+
+def test_failed_batch_adds_nothing(tmp_path):
+    storage = make_storage(tmp_path)
+    first = add(storage, 1)
+
+    def items():
+        yield "Math", make_video("Video 2", "https://youtu.be/abcdefghij2", "abcdefghij2")
+        raise ValueError("bad row")
+
+    with pytest.raises(ValueError):
+        storage.add_videos(items())
+    assert set(storage.load_videos()["index"]) == {first}
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from edutube.catalog import make_video
+from edutube.search import SearchIndex
+
+
+def catalog(videos):
+    return {"categories": {"Math": {video["key"]: video for video in videos}}}
+
+
+def video(n, tags):
+    return make_video(f"Video {n}", f"https://youtu.be/abcdefghij{n}", f"abcdefghij{n}", tags=tags)
+
+
+@pytest.mark.parametrize("read", [
+    lambda index: index.tag_counts(),
+    lambda index: index.tag_counts({"x"}),
+    lambda index: index.with_tags(["a"]),
+    lambda index: index.category_keys("Math"),
+])
+def test_facets_wait_for_index_writes(read):
+    # Index jobs change the postings in place; readers must not iterate them mid-write
+    index = SearchIndex.from_catalog(catalog([video(n, "a") for n in range(3)]))
+    finished = threading.Event()
+    reader = threading.Thread(target=lambda: (read(index), finished.set()))
+    with index._lock:
+        reader.start()
+        assert not finished.wait(0.05)
+    reader.join()
+    assert finished.is_set()
+
+
+def test_facets_return_copies():
+    videos = [video(n, "a") for n in range(3)]
+    index = SearchIndex.from_catalog(catalog(videos))
+    in_category = index.category_keys("Math")
+    tagged = index.with_tags(["a"])
+    index.remove_video(videos[0]["key"])
+
+    assert in_category == tagged == {v["key"] for v in videos}
+    assert index.category_keys("Nope") == set()
@@ -0,0 +1,56 @@
+import pytest
+
+from edutube.urls import YouTubeURL, canonical_url, extract_video_ids, parse_youtube_url
+
+ID = "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url, expected", [
+    (f"https://youtu.be/{ID}", YouTubeURL(ID, None, None)),
+    (f"youtu.be/{ID}?si=abc", YouTubeURL(ID, None, None)),
+    (f"https://www.youtube.com/watch?v={ID}", YouTubeURL(ID, None, None)),
+    (f"https://www.youtube.com/watch?feature=share&v={ID}", YouTubeURL(ID, None, None)),
+    (f"https://www.youtube.com/shorts/{ID}", YouTubeURL(ID, None, None)),
+    (f"https://www.youtube.com/embed/{ID}?start=30", YouTubeURL(ID, 30, None)),
+    (f"https://www.youtube-nocookie.com/embed/{ID}", YouTubeURL(ID, None, None)),
+    (f"https://www.youtube.com/live/{ID}", YouTubeURL(ID, None, None)),
+    (f"https://www.youtube.com/v/{ID}", YouTubeURL(ID, None, None)),
+    (f"https://m.youtube.com/watch?v={ID}", YouTubeURL(ID, None, None)),
+    (f"https://music.youtube.com/watch?v={ID}", YouTubeURL(ID, None, None)),
+    (f"  HTTPS://WWW.YOUTUBE.COM/watch?v={ID}  ", YouTubeURL(ID, None, None)),
+    (f"https://www.youtube.com/watch?v={ID}&t=1m2s", YouTubeURL(ID, 62, None)),
+    (f"https://youtu.be/{ID}?t=90", YouTubeURL(ID, 90, None)),
+    (f"https://www.youtube.com/watch?v={ID}#t=1h2m3s", YouTubeURL(ID, 3723, None)),
+    (f"https://www.youtube.com/watch?v={ID}&list=PL123", YouTubeURL(ID, None, "PL123")),
+    ("https://www.youtube.com/playlist?list=PL123", YouTubeURL(None, None, "PL123")),
+])
+def test_parses_every_form(url, expected):
+    assert parse_youtube_url(url) == expected
+
+
+@pytest.mark.parametrize("url", [
+    "https://youtu.be/short",
+    f"https://youtu.be/{ID}x",
+    "https://www.youtube.com/watch?v=tooshort",
+    f"https://www.youtube.com/shorts/{ID}extra",
+    "https://www.youtube.com/watch",
+    f"https://vimeo.com/{ID}",
+    f"https://notyoutube.com/watch?v={ID}",
+    "",
+])
+def test_rejects_invalid(url):
+    assert parse_youtube_url(url) is None
+
+
+def test_bad_start_is_ignored():
+    assert parse_youtube_url(f"https://youtu.be/{ID}?t=abc") == YouTubeURL(ID, None, None)
+
+
+def test_extract_video_ids_batch():
+    urls = [f"https://youtu.be/{ID}", "https://example.com", "https://www.youtube.com/playlist?list=PL1"]
+    assert extract_video_ids(urls) == [ID, None, None]
+
+
+def test_canonical_url_round_trips():
+    assert canonical_url(ID) == f"https://www.youtube.com/watch?v={ID}"
+    assert parse_youtube_url(canonical_url(ID, 62)) == YouTubeURL(ID, 62, None)